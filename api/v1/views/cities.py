@@ -20,7 +20,7 @@ def get_state_cities(state_id=None):
         200 and a list of City objects in JSON of a State object if state_id
         is linked to a State object"""
 
-    state = storage.get(State, state_id)
+    state = storage.get(State, state_id, load=("cities",))
     if not state:
         abort(404)
 
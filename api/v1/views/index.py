@@ -4,6 +4,8 @@
 from api.v1.views import app_views
 from flask import make_response, jsonify
 from models import storage
+from os import getenv
+import time
 
 
 @app_views.route("/status")
@@ -14,24 +16,30 @@ def status():
     return response
 
 
+types = {
+         "Amenity": "amenities",
+         "City": "cities",
+         "Place": "places",
+         "Review": "reviews",
+         "State": "states",
+         "User": "users"
+         }
+stats_ttl = float(getenv("HBNB_API_STATS_TTL", 0))
+stats_cache = (0, None)
+
+
 @app_views.route("/stats")
 def stats():
-    """Retrieves the number of each object by type"""
-    obj_count = {}
-    objs = storage.all()
-    types = {
-             "Amenity": "amenities",
-             "City": "cities",
-             "Place": "places",
-             "Review": "reviews",
-             "State": "states",
-             "User": "users"
-             }
-
-    for v in objs.values():
-        obj_type = v.__class__.__name__
-        if obj_type in types.keys():
-            obj_count[types.get(obj_type)] = storage.count(v.__class__)
+    """Retrieves the number of each object by type, from a copy at most
+    HBNB_API_STATS_TTL seconds old when it is set"""
+    global stats_cache
+    expires, obj_count = stats_cache
+    if obj_count is None or time.monotonic() >= expires:
+        counts = storage.count_by_class()
+        obj_count = {plural: counts.get(name, 0)
+                     for name, plural in types.items()}
+        if stats_ttl > 0:
+            stats_cache = (time.monotonic() + stats_ttl, obj_count)
 
     response = make_response(jsonify(obj_count))
 
@@ -20,7 +20,7 @@ def get_city_places(city_id=None):
         404 error if city_id is not linked to a City object
         200 and a list of all City objects of the Place object in JSON"""
 
-    city = storage.get(City, city_id)
+    city = storage.get(City, city_id, load=("places",))
     if not city:
         abort(404)
 
@@ -21,14 +21,11 @@ def get_place_amenities(place_id=None):
         404 error if place_id is not linked to any Place object
         200 and a list of Amenity objects of the Place object in JSON"""
 
-    place = storage.get(Place, place_id)
+    place = storage.get(Place, place_id, load=("amenities",))
     if not place:
         abort(404)
 
-    if getenv("HBNB_TYPE_STORAGE") != "db":
-        amenity_list = place.amenities
-    else:
-        amenity_list = [amenity.to_dict() for amenity in place.amenities]
+    amenity_list = [amenity.to_dict() for amenity in place.amenities]
 
     response = make_response(jsonify(amenity_list))
 
@@ -60,16 +57,15 @@ def delete_place_amenity_by_id(place_id=None, amenity_id=None):
     if not amenity:
         abort(404)
 
-    if getenv("HBNB_TYPE_STORAGE") != "db":
-        place_amenity = any(amenity.id == amen for amen in place.amenities)
-    else:
-        place_amenity = any(amenity.id == amen.id for amen in place.amenities)
+    place_amenity = any(amenity.id == amen.id for amen in place.amenities)
 
     if not place_amenity:
         abort(404)
 
     if getenv("HBNB_TYPE_STORAGE") != "db":
-        place.amenities.remove(amenity_id)
+        place.amenity_ids = [amen_id for amen_id in place.amenity_ids
+                             if amen_id != amenity_id]
+        place.save()
     else:
         amenity.delete()
     storage.save()
@@ -107,15 +103,10 @@ def create_place_amenity(place_id=None, amenity_id=None):
     if not amenity:
         abort(404)
 
-    if getenv("HBNB_STORAGE_TYPE") != "db":
-        place_amenity = any(amenity.id == amen for amen in place.amenities)
-    else:
-        place_amenity = any(amenity.id == ame.id for ame.id in place.amenities)
+    place_amenity = any(amenity.id == amen.id for amen in place.amenities)
 
     if not place_amenity:
         if getenv("HBNB_TYPE_STORAGE") != "db":
-            if "amenity_ids" not in place.to_dict().keys():
-                setattr(place, "amenity_ids", list())
             place.amenities = amenity
         else:
             place.amenities.append(amenity)
@@ -20,7 +20,7 @@ def get_place_reviews(place_id=None):
         404 error if place_id is not linked to any Place object
         200 and a list of Review object linked to the Place object"""
 
-    place = storage.get(Place, place_id)
+    place = storage.get(Place, place_id, load=("reviews",))
     if not place:
         abort(404)
 
@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+"""
+Compares the size and speed of the FileStorage codecs
+
+Usage: python3 -m benchmarks.bench_codecs [number of objects]
+"""
+
+import os
+import sys
+import tempfile
+import timeit
+from models.engine.file_codecs import codecs, get_codec
+from models.place import Place
+from models.review import Review
+
+
+def make_objects(count):
+    """returns count Place and Review objects keyed by <class name>.id"""
+    objs = {}
+    for i in range(count // 2):
+        place = Place(name="Place {}".format(i), city_id="city",
+                      user_id="user", number_rooms=i % 5, latitude=5.6)
+        review = Review(place_id=place.id, user_id="user",
+                        text="Review {}".format(i))
+        for obj in (place, review):
+            objs[obj.__class__.__name__ + "." + obj.id] = obj
+    return objs
+
+
+def bench(name, objs, path):
+    """returns the size, save time and reload time of the objects with the
+    codec called name"""
+    codec = get_codec(name)
+    classes = {"Place": Place, "Review": Review}
+
+    def save():
+        """writes every object to path"""
+        with open(path, "wb" if codec.binary else "w") as f:
+            codec.dump(((key, codec.record(obj))
+                        for key, obj in objs.items()), f)
+
+    def reload():
+        """builds every object back from path"""
+        with open(path, "rb" if codec.binary else "r") as f:
+            for key, record in codec.load(f):
+                classes[record["__class__"]].from_dict(record)
+
+    save_time = min(timeit.repeat(save, number=1, repeat=3))
+    reload_time = min(timeit.repeat(reload, number=1, repeat=3))
+    return os.path.getsize(path), save_time, reload_time
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    objs = make_objects(count)
+    print("{:8} {:>12} {:>10} {:>10}".format("codec", "bytes", "save s",
+                                             "reload s"))
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in codecs:
+            try:
+                get_codec(name)
+            except ImportError:
+                continue
+            size, save_time, reload_time = bench(
+                name, objs, os.path.join(tmp, "file." + name))
+            print("{:8} {:>12} {:>10.3f} {:>10.3f}".format(
+                name, size, save_time, reload_time))
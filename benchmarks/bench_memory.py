@@ -0,0 +1,95 @@
+#!/usr/bin/python3
+"""
+Reports the memory FileStorage uses per object, with the default models and
+with the compact ones (HBNB_COMPACT_MODELS=1)
+
+Usage: python3 -m benchmarks.bench_memory [number of objects]
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+import uuid
+
+
+def make_records(count):
+    """returns count Place and Review records keyed by <class name>.id, for
+    100 cities and 1000 users"""
+    cities = [str(uuid.uuid4()) for i in range(100)]
+    users = [str(uuid.uuid4()) for i in range(1000)]
+    records = {}
+    for i in range(count // 2):
+        place_id = str(uuid.uuid4())
+        review_id = str(uuid.uuid4())
+        date = "2017-09-28T21:03:54.{:06d}".format(i % 1000000)
+        records["Place." + place_id] = {
+            "__class__": "Place", "id": place_id,
+            "created_at": date, "updated_at": date,
+            "city_id": cities[i % len(cities)],
+            "user_id": users[i % len(users)],
+            "name": "Place {}".format(i), "description": "A place to stay",
+            "number_rooms": i % 5, "number_bathrooms": 1, "max_guest": 4,
+            "price_by_night": 100, "latitude": 5.6, "longitude": -0.2,
+            "amenity_ids": []}
+        records["Review." + review_id] = {
+            "__class__": "Review", "id": review_id,
+            "created_at": date, "updated_at": date, "place_id": place_id,
+            "user_id": users[(i * 7) % len(users)],
+            "text": "Review {}".format(i)}
+    return records
+
+
+def measure(count):
+    """prints the bytes per object of the objects alone, of FileStorage
+    after reload() and after save()"""
+    import models
+    from models.engine.file_storage import FileStorage, classes
+    storage = FileStorage()
+    records = make_records(count)
+    with open("file.json", "w") as f:
+        json.dump(records, f)
+    del records
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    with open("file.json", "r") as f:
+        objs = [classes[record["__class__"]].from_dict(record)
+                for record in json.load(f).values()]
+    for obj in objs:
+        obj.attributes()
+    alone = tracemalloc.get_traced_memory()[0]
+    del objs
+    before = tracemalloc.get_traced_memory()[0]
+    storage.reload()
+    loaded = tracemalloc.get_traced_memory()[0]
+    storage._write_snapshot()
+    saved = tracemalloc.get_traced_memory()[0]
+    print(json.dumps({"objects": (alone - start) / count,
+                      "reload": (loaded - before) / count,
+                      "save": (saved - before) / count}))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--child":
+        measure(int(sys.argv[2]))
+        sys.exit(0)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    print("bytes per object, {} objects".format(count))
+    print("{:10} {:>10} {:>10} {:>10}".format("models", "objects",
+                                              "reloaded", "saved"))
+    for name, value in (("default", "0"), ("compact", "1")):
+        env = dict(os.environ, HBNB_COMPACT_MODELS=value,
+                   PYTHONPATH=root + os.pathsep +
+                   os.environ.get("PYTHONPATH", ""))
+        env.pop("HBNB_TYPE_STORAGE", None)
+        with tempfile.TemporaryDirectory() as tmp:
+            out = subprocess.run([sys.executable, "-m",
+                                  "benchmarks.bench_memory", "--child",
+                                  str(count)], cwd=tmp, env=env, check=True,
+                                 stdout=subprocess.PIPE).stdout
+        result = json.loads(out)
+        print("{:10} {:>10.0f} {:>10.0f} {:>10.0f}".format(
+            name, result["objects"], result["reload"], result["save"]))
@@ -0,0 +1,96 @@
+#!/usr/bin/python3
+"""
+Runs threads that each make requests through DBStorage, holding a connection
+for hold_ms per request as a remote database would, and reports the request
+rate and the pool metrics for several pool sizes. The database is a SQLite
+file unless a url is given, for example of a scratch local MySQL
+database, where it adds 100 states per run
+
+Usage: python3 -m benchmarks.bench_pool [threads] [requests per thread]
+                                        [hold_ms] [url]
+"""
+
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+
+def measure(threads, requests, hold_ms):
+    """prints the requests per second and the pool_stats() of threads
+    threads making requests requests each"""
+    import models
+    from models.state import State
+    storage = models.storage
+    ids = []
+    for i in range(100):
+        state = State(name="State {}".format(i))
+        storage.new(state)
+        ids.append(state.id)
+    storage.save()
+    storage.close()
+    errors = []
+
+    def work():
+        """makes requests like the API does, closing the session after
+        each one"""
+        for i in range(requests):
+            try:
+                storage.get(State, random.choice(ids))
+                time.sleep(hold_ms / 1000)
+            except Exception as error:
+                errors.append(type(error).__name__)
+            finally:
+                storage.close()
+
+    workers = [threading.Thread(target=work) for i in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    seconds = time.perf_counter() - start
+    stats = storage.pool_stats()
+    stats.update(rate=threads * requests / seconds, errors=len(errors))
+    print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 4 and sys.argv[1] == "--child":
+        measure(int(sys.argv[2]), int(sys.argv[3]), float(sys.argv[4]))
+        sys.exit(0)
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    hold_ms = sys.argv[3] if len(sys.argv) > 3 else "5"
+    url = sys.argv[4] if len(sys.argv) > 4 else None
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    print("{} threads, {} requests each, {} ms per request".format(
+        threads, requests, hold_ms))
+    print("{:>5} {:>9} {:>8} {:>9} {:>9} {:>9} {:>7}".format(
+        "pool", "overflow", "req/s", "avg wait", "max wait", "timeouts",
+        "errors"))
+    for size, overflow in ((1, 0), (5, 0), (5, 10), (threads, 0)):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, HBNB_TYPE_STORAGE="db",
+                       HBNB_MYSQL_POOL_SIZE=str(size),
+                       HBNB_MYSQL_POOL_OVERFLOW=str(overflow),
+                       HBNB_DB_URL=url or "sqlite:///" +
+                       os.path.join(tmp, "bench.db"),
+                       PYTHONPATH=root + os.pathsep +
+                       os.environ.get("PYTHONPATH", ""))
+            env.pop("HBNB_ENV", None)
+            out = subprocess.run([sys.executable, "-m",
+                                  "benchmarks.bench_pool", "--child",
+                                  str(threads), str(requests), hold_ms],
+                                 cwd=tmp, env=env, check=True,
+                                 stdout=subprocess.PIPE).stdout
+        result = json.loads(out)
+        print("{:>5} {:>9} {:>8.0f} {:>8.1f}ms {:>7.1f}ms {:>9} {:>7}".format(
+            size, overflow, result["rate"],
+            1000 * result["wait_time"] / max(result["checkouts"], 1),
+            1000 * result["max_wait"], result["timeouts"],
+            result["errors"]))
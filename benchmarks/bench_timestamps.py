@@ -0,0 +1,46 @@
+#!/usr/bin/python3
+"""
+Compares strptime/strftime with the timestamp helpers of BaseModel
+
+Usage: python3 -m benchmarks.bench_timestamps [number of objects]
+"""
+
+from datetime import datetime, timedelta
+import sys
+import timeit
+from models.base_model import BaseModel, format_time, parse_time, time
+
+
+def make_dates(count):
+    """returns count distinct datetimes and their strings"""
+    start = datetime(2017, 9, 28, 21, 3, 54, 52298)
+    dates = [start + timedelta(seconds=i, microseconds=i)
+             for i in range(count)]
+    return dates, [date.strftime(time) for date in dates]
+
+
+def bench(count):
+    """returns the (name, seconds) of each way of parsing and writing
+    count timestamps, and of building and writing count objects"""
+    dates, strings = make_dates(count)
+    records = [{"id": str(i), "created_at": string, "updated_at": string,
+                "__class__": "BaseModel"} for i, string in enumerate(strings)]
+    objs = [BaseModel(**record) for record in records]
+    cases = [
+        ("strptime", lambda: [datetime.strptime(s, time) for s in strings]),
+        ("parse_time", lambda: [parse_time(s) for s in strings]),
+        ("strftime", lambda: [d.strftime(time) for d in dates]),
+        ("format_time", lambda: [format_time(d) for d in dates]),
+        ("BaseModel(**record)", lambda: [BaseModel(**record)
+                                         for record in records]),
+        ("to_dict()", lambda: [obj.to_dict() for obj in objs]),
+    ]
+    return [(name, min(timeit.repeat(case, number=1, repeat=3)))
+            for name, case in cases]
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    print("{:20} {:>10}".format("{} objects".format(count), "seconds"))
+    for name, seconds in bench(count):
+        print("{:20} {:>10.3f}".format(name, seconds))
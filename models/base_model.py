@@ -9,9 +9,65 @@ from os import getenv
 import sqlalchemy
 from sqlalchemy import Column, String, DateTime
 from sqlalchemy.ext.declarative import declarative_base
+import sys
+import types
 import uuid
 
 time = "%Y-%m-%dT%H:%M:%S.%f"
+dates = ("created_at", "updated_at")
+# compact mode - outside db mode, HBNB_COMPACT_MODELS=1 stores the
+# attributes the models declare in slots instead of a __dict__
+compact = models.storage_t != "db" and getenv("HBNB_COMPACT_MODELS") == "1"
+
+
+def parse_time(value):
+    """returns the datetime written as value in the time format"""
+    return datetime.fromisoformat(value)
+
+
+def format_time(value):
+    """returns the datetime value written in the time format, as strftime
+    would, several times faster"""
+    return value.isoformat(timespec="microseconds")
+
+
+def intern_ids(value):
+    """returns value interned, or a list of the interned ids of value when
+    it is a list, so that the objects pointing to one id share the string"""
+    if type(value) is str:
+        return sys.intern(value)
+    if type(value) is list:
+        return [sys.intern(item) if type(item) is str else item
+                for item in value]
+    return value
+
+
+class CompactMeta(type):
+    """builds the model classes of compact mode, whose attributes declared
+    with a default become slots"""
+
+    def __new__(mcs, name, bases, namespace):
+        """moves the defaults of the class attributes to _defaults and makes
+        a slot for each of them"""
+        fields = [key for key, value in namespace.items()
+                  if not key.startswith("_") and not callable(value) and
+                  not isinstance(value, (property, classmethod,
+                                         staticmethod))]
+        defaults = {}
+        for base in reversed(bases):
+            defaults.update(getattr(base, "_defaults", {}))
+        for key in fields:
+            defaults[key] = namespace.pop(key)
+        namespace["_defaults"] = defaults
+        namespace.setdefault("__slots__", tuple(fields))
+        cls = super().__new__(mcs, name, bases, namespace)
+        cls._fields = tuple(
+            (key, value) for klass in reversed(cls.__mro__)
+            for key, value in vars(klass).items()
+            if isinstance(value, types.MemberDescriptorType) and
+            not key.startswith("_"))
+        return cls
+
 
 if models.storage_t == "db":
     Base = declarative_base()
@@ -19,52 +75,179 @@ else:
     Base = object
 
 
-class BaseModel:
+class BaseModel(metaclass=CompactMeta if compact else type):
     """The BaseModel class from which future classes will be derived"""
+    # _interned - attributes other than id, <name>_id and <name>_ids whose
+    # values are interned when an object is built from a dictionary
+    _interned = ()
     if models.storage_t == "db":
         id = Column(String(60), primary_key=True)
         created_at = Column(DateTime, default=datetime.utcnow)
         updated_at = Column(DateTime, default=datetime.utcnow)
+    else:
+        # kept out of __dict__: _changed - names of the attributes set since
+        # the object was last saved or loaded, () if none, None if it never
+        # was. _fragment - the object as FileStorage last wrote it. In
+        # compact mode _extra holds the attributes that have no slot
+        if compact:
+            __slots__ = ("__weakref__", "_changed", "_extra", "id",
+                         "created_at", "updated_at")
+        else:
+            __slots__ = ("__dict__", "__weakref__", "_changed", "_fragment")
+
+        def __setattr__(self, name, value):
+            """sets the attribute and records it as changed"""
+            try:
+                object.__setattr__(self, name, value)
+            except AttributeError:
+                if not compact or hasattr(type(self), name):
+                    raise
+                extra = getattr(self, "_extra", None)
+                if extra is None:
+                    extra = {}
+                    object.__setattr__(self, "_extra", extra)
+                extra[name] = value
+            self._change(name)
+
+        def __delattr__(self, name):
+            """deletes the attribute and records it as changed"""
+            try:
+                object.__delattr__(self, name)
+            except AttributeError:
+                extra = getattr(self, "_extra", None)
+                if not compact or not extra or name not in extra:
+                    raise
+                del extra[name]
+            self._change(name)
+
+        def _change(self, name):
+            """records the attribute name as changed, and tells the storage
+            when a saved object changes for the first time or when a foreign
+            key is set"""
+            if name == "_fragment":
+                return
+            changed = getattr(self, "_changed", None)
+            first = changed == ()
+            if first:
+                object.__setattr__(self, "_changed", {name})
+            elif changed is not None:
+                changed.add(name)
+            if first or name.endswith("_id"):
+                models.storage.changed(self, name)
+
+        if compact:
+            @property
+            def __dict__(self):
+                """returns a copy of the attributes, for the code that reads
+                them through __dict__ or vars()"""
+                return self.attributes()
+
+            def __getattr__(self, name):
+                """returns the attributes that have no slot, or the default
+                of the unset ones"""
+                try:
+                    return object.__getattribute__(self, "_extra")[name]
+                except (AttributeError, KeyError, TypeError):
+                    pass
+                try:
+                    return type(self)._defaults[name]
+                except KeyError:
+                    raise AttributeError("'{}' object has no attribute '{}'"
+                                         .format(type(self).__name__,
+                                                 name)) from None
 
     def __init__(self, *args, **kwargs):
         """Initialization of the base model"""
         if kwargs:
             for key, value in kwargs.items():
+                if key in dates and value and type(value) is str:
+                    value = parse_time(value)
+                elif (key == "id" or key.endswith(("_id", "_ids")) or
+                      key in self._interned):
+                    value = intern_ids(value)
                 if key != "__class__":
                     setattr(self, key, value)
-            if kwargs.get("created_at", None) and type(self.created_at) is str:
-                self.created_at = datetime.strptime(kwargs["created_at"], time)
-            else:
+            if type(getattr(self, "created_at", None)) is not datetime:
                 self.created_at = datetime.utcnow()
-            if kwargs.get("updated_at", None) and type(self.updated_at) is str:
-                self.updated_at = datetime.strptime(kwargs["updated_at"], time)
-            else:
+            if type(getattr(self, "updated_at", None)) is not datetime:
                 self.updated_at = datetime.utcnow()
             if kwargs.get("id", None) is None:
-                self.id = str(uuid.uuid4())
+                self.id = sys.intern(str(uuid.uuid4()))
         else:
-            self.id = str(uuid.uuid4())
+            self.id = sys.intern(str(uuid.uuid4()))
             self.created_at = datetime.utcnow()
             self.updated_at = self.created_at
 
     def __str__(self):
         """String representation of the BaseModel class"""
         return "[{:s}] ({:s}) {}".format(self.__class__.__name__, self.id,
-                                         self.__dict__)
+                                         self.attributes())
+
+    def changed_fields(self):
+        """returns the set of the names of the attributes set since the
+        object was last saved or loaded, or of all of them if it never was"""
+        if models.storage_t == "db":
+            state = sqlalchemy.inspect(self, raiseerr=False)
+            if state is None:
+                return set(self.attributes())
+            if not state.has_identity or state.deleted or state.was_deleted:
+                return {attr.key for attr in state.mapper.column_attrs}
+            return {attr.key for attr in state.attrs
+                    if attr.history.has_changes()}
+        changed = getattr(self, "_changed", None)
+        if changed is None:
+            return set(self.attributes())
+        return set(changed)
+
+    def mark_saved(self, saved=True):
+        """tells the object it is stored as it is now, or with saved False
+        that it has to be written whole, as when it is not stored anymore.
+        Storage engines call it, SQLAlchemy keeps track on its own in db
+        mode"""
+        if models.storage_t != "db":
+            object.__setattr__(self, "_changed", () if saved else None)
+
+    @classmethod
+    def from_dict(cls, record):
+        """returns the object stored as record, a dictionary returned by
+        to_dict(), marked as saved. Storage engines build the objects they
+        read with it"""
+        obj = cls(**record)
+        obj.mark_saved()
+        return obj
 
     def save(self):
-        """updates the attribute 'updated_at' with the current datetime"""
+        """updates the attribute 'updated_at' with the current datetime
+
+        The whole object is written again, with the changes made inside its
+        mutable attributes"""
+        self.mark_saved(False)
         self.updated_at = datetime.utcnow()
         models.storage.new(self)
         models.storage.save()
 
+    def attributes(self):
+        """returns the dictionary of the attributes of the instance, which
+        is not to be changed"""
+        if not compact:
+            return self.__dict__
+        cls = type(self)
+        values = {}
+        for name, slot in cls._fields:
+            try:
+                values[name] = slot.__get__(self, cls)
+            except AttributeError:
+                pass
+        values.update(getattr(self, "_extra", None) or {})
+        return values
+
     def to_dict(self):
         """returns a dictionary containing all keys/values of the instance"""
-        new_dict = self.__dict__.copy()
+        new_dict = dict(self.attributes())
         if "created_at" in new_dict:
-            new_dict["created_at"] = new_dict["created_at"].strftime(time)
+            new_dict["created_at"] = format_time(new_dict["created_at"])
         if "updated_at" in new_dict:
-            new_dict["updated_at"] = new_dict["updated_at"].strftime(time)
+            new_dict["updated_at"] = format_time(new_dict["updated_at"])
         new_dict["__class__"] = self.__class__.__name__
         if "_sa_instance_state" in new_dict:
             del new_dict["_sa_instance_state"]
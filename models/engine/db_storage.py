@@ -3,6 +3,7 @@
 Contains the class DBStorage
 """
 
+from contextlib import contextmanager
 import models
 from models.amenity import Amenity
 from models.base_model import BaseModel, Base
@@ -13,17 +14,65 @@ from models.state import State
 from models.user import User
 from os import getenv
 import sqlalchemy
-from sqlalchemy import create_engine
-from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy import create_engine, event, func, literal, select, union_all
+from sqlalchemy.orm import joinedload, scoped_session, selectinload
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+import threading
+import time
 
 classes = {"Amenity": Amenity, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
+loaders = {"selectin": selectinload, "joined": joinedload}
+
+
+def pool_options():
+    """returns the connection pool arguments of create_engine, set with the
+    HBNB_MYSQL_POOL_* variables"""
+    return {"pool_size": int(getenv("HBNB_MYSQL_POOL_SIZE", 5)),
+            "max_overflow": int(getenv("HBNB_MYSQL_POOL_OVERFLOW", 10)),
+            "pool_timeout": float(getenv("HBNB_MYSQL_POOL_TIMEOUT", 30)),
+            "pool_recycle": int(getenv("HBNB_MYSQL_POOL_RECYCLE", 3600)),
+            "pool_pre_ping": getenv("HBNB_MYSQL_POOL_PRE_PING", "1") == "1"}
+
+
+class MeteredPool(QueuePool):
+    """QueuePool that counts its checkouts and the time spent waiting for a
+    connection"""
+
+    def __init__(self, *args, **kwargs):
+        """Instantiate a MeteredPool with empty counters"""
+        super().__init__(*args, **kwargs)
+        self.metrics_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+
+    def _do_get(self):
+        """returns a connection, recording how long it took to get it"""
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except sqlalchemy.exc.TimeoutError:
+            with self.metrics_lock:
+                self.timeouts += 1
+            raise
+        waited = time.perf_counter() - start
+        with self.metrics_lock:
+            self.checkouts += 1
+            self.wait_time += waited
+            self.max_wait = max(self.max_wait, waited)
+        return connection
 
 
 class DBStorage:
     """interaacts with the MySQL database"""
     __engine = None
     __session = None
+    __batch = None
+    __queries = 0
+    __queries_lock = None
 
     def __init__(self):
         """Instantiate a DBStorage object"""
@@ -32,20 +81,60 @@ class DBStorage:
         HBNB_MYSQL_HOST = getenv('HBNB_MYSQL_HOST')
         HBNB_MYSQL_DB = getenv('HBNB_MYSQL_DB')
         HBNB_ENV = getenv('HBNB_ENV')
-        self.__engine = create_engine('mysql+mysqldb://{}:{}@{}/{}'.
-                                      format(HBNB_MYSQL_USER,
-                                             HBNB_MYSQL_PWD,
-                                             HBNB_MYSQL_HOST,
-                                             HBNB_MYSQL_DB))
+        url = getenv('HBNB_DB_URL') or 'mysql+mysqldb://{}:{}@{}/{}'.format(
+            HBNB_MYSQL_USER, HBNB_MYSQL_PWD, HBNB_MYSQL_HOST, HBNB_MYSQL_DB)
+        self.__engine = create_engine(url, poolclass=MeteredPool,
+                                      **pool_options())
+        self.__queries_lock = threading.Lock()
+        event.listen(self.__engine, "before_cursor_execute",
+                     self._count_query)
         if HBNB_ENV == "test":
             Base.metadata.drop_all(self.__engine)
+        self.__batch = threading.local()
+
+    def _count_query(self, *args):
+        """counts a statement sent to the database"""
+        with self.__queries_lock:
+            self.__queries += 1
+
+    def query_count(self):
+        """Returns the number of statements sent to the database so far"""
+        return self.__queries
 
-    def all(self, cls=None):
-        """query on the current database session"""
+    @staticmethod
+    def _load_options(cls, load, strategy):
+        """returns the loader options that load the relationships named in
+        load with strategy, selectin or joined. A dotted name, like
+        cities.places, loads the relationships of the loaded objects"""
+        if strategy not in loaders:
+            raise ValueError("unknown loading strategy {}".format(strategy))
+        options = []
+        for path in load:
+            option = None
+            for name in path.split("."):
+                attr = getattr(cls, name)
+                if option is None:
+                    option = loaders[strategy](attr)
+                else:
+                    option = getattr(option, strategy + "load")(attr)
+                cls = attr.property.mapper.class_
+            options.append(option)
+        return options
+
+    def all(self, cls=None, load=(), strategy="selectin"):
+        """query on the current database session
+
+        With a class, the relationships named in load are loaded along with
+        the objects, with one more query each in the default selectin
+        strategy, or in the same query with the joined one"""
         new_dict = {}
         for clss in classes:
             if cls is None or cls is classes[clss] or cls is clss:
-                objs = self.__session.query(classes[clss]).all()
+                query = self.__session.query(classes[clss])
+                if cls is not None and load:
+                    query = query.options(*self._load_options(
+                        classes[clss], load, strategy))
+                objs = query.all()
                 for obj in objs:
                     key = obj.__class__.__name__ + '.' + obj.id
                     new_dict[key] = obj
@@ -56,8 +145,29 @@ class DBStorage:
         self.__session.add(obj)
 
     def save(self):
-        """commit all changes of the current database session"""
-        self.__session.commit()
+        """commit all changes of the current database session, or only
+        flush them inside a batch() block"""
+        if getattr(self.__batch, "depth", 0):
+            self.__session.flush()
+        else:
+            self.__session.commit()
+
+    @contextmanager
+    def batch(self):
+        """commits the changes of the block once at its end, or rolls them
+        back if it raises"""
+        depth = getattr(self.__batch, "depth", 0)
+        self.__batch.depth = depth + 1
+        try:
+            yield self
+        except BaseException:
+            if not depth:
+                self.__session.rollback()
+            raise
+        finally:
+            self.__batch.depth = depth
+        if not depth:
+            self.__session.commit()
 
     def delete(self, obj=None):
         """delete from the current database session obj if not None"""
@@ -75,12 +185,63 @@ class DBStorage:
         """call remove() method on the private session attribute"""
         self.__session.remove()
 
-    def get(self, cls, id):
-        """Retrieves a specific object based on cls and id"""
-        key = "{}.{}".format(cls.__name__, id)
-        return self.all(cls).get(key)
+    def pool_stats(self):
+        """Returns the state of the connection pool: its size, the
+        connections checked out and in overflow, and the number of
+        checkouts, timeouts and seconds spent waiting for a connection"""
+        pool = self.__engine.pool
+        stats = {"size": pool.size(), "checked_out": pool.checkedout(),
+                 "overflow": max(pool.overflow(), 0)}
+        if isinstance(pool, MeteredPool):
+            with pool.metrics_lock:
+                stats.update(checkouts=pool.checkouts,
+                             timeouts=pool.timeouts,
+                             wait_time=pool.wait_time,
+                             max_wait=pool.max_wait)
+        return stats
+
+    def get(self, cls, id, load=(), strategy="joined"):
+        """Retrieves a specific object based on cls and id, from the
+        identity map of the session when it is already loaded, else with
+        the relationships named in load in the same query"""
+        cls = classes.get(cls, cls)
+        if cls not in classes.values() or id is None:
+            return None
+        return self.__session.get(
+            cls, id, options=self._load_options(cls, load, strategy))
+
+    def get_many(self, cls, ids):
+        """Retrieves the objects of cls whose ids are in ids with one query,
+        in the order of ids and leaving out the missing ones"""
+        cls = classes.get(cls, cls)
+        ids = list(ids)
+        if cls not in classes.values() or not ids:
+            return []
+        found = {obj.id: obj for obj in self.__session.query(cls).filter(
+            cls.id.in_(set(ids))).all()}
+        return [found[obj_id] for obj_id in ids if obj_id in found]
+
+    def related(self, cls, attr, value):
+        """Returns the list of objects of cls whose attribute attr is value"""
+        return self.__session.query(cls).filter(
+            getattr(cls, attr) == value).all()
 
     def count(self, cls=None):
         """Returns the number of objects in storage matching the given class
         If no class is passed, returns the number of all objects in storage"""
-        return len(self.all(cls))
+        if cls is None:
+            return sum(self.count_by_class().values())
+        cls = classes.get(cls, cls)
+        if cls not in classes.values():
+            return 0
+        return self.__session.query(func.count(cls.id)).scalar()
+
+    def count_by_class(self):
+        """Returns the number of objects of each class, by class name, with
+        one query"""
+        query = union_all(*(
+            select(literal(name).label("name"),
+                   func.count(clss.id).label("count"))
+            for name, clss in classes.items()))
+        counts = dict(self.__session.execute(query).all())
+        return {name: counts.get(name, 0) for name in classes}
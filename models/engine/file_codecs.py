@@ -0,0 +1,270 @@
+#!/usr/bin/python3
+"""
+Contains the codecs FileStorage uses to write and read its file
+"""
+
+from datetime import datetime, timedelta
+import json
+import marshal
+from models.base_model import format_time, parse_time
+import pickle
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+epoch = datetime(1970, 1, 1)
+dates = ("created_at", "updated_at")
+
+
+def iter_json_object(f, chunk_size=65536):
+    """yields the (key, value) pairs of the JSON object in the file f one at
+    a time, reading it by chunks instead of loading the whole document"""
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+
+    def fill(buf, pos):
+        """drops the consumed part of buf and appends the next chunk"""
+        chunk = f.read(chunk_size)
+        if not chunk:
+            raise ValueError("Unexpected end of JSON data")
+        return buf[pos:] + chunk, 0
+
+    def skip(buf, pos):
+        """moves pos to the next character that is not whitespace"""
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\n\r":
+                pos += 1
+            if pos < len(buf):
+                return buf, pos
+            buf, pos = fill(buf, pos)
+
+    def decode(buf, pos):
+        """decodes the JSON value at pos, reading more until it is whole"""
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except ValueError:
+                buf, pos = fill(buf, pos)
+                continue
+            if end == len(buf) and not isinstance(value, (str, dict, list)):
+                # a number or literal may go on in the next chunk
+                try:
+                    buf, pos = fill(buf, pos)
+                    continue
+                except ValueError:
+                    pass
+            return value, buf, end
+
+    try:
+        buf, pos = skip(buf, pos)
+    except ValueError:
+        return
+    if buf[pos] != "{":
+        raise ValueError("Expecting a JSON object")
+    buf, pos = skip(buf, pos + 1)
+    if buf[pos] == "}":
+        return
+    while True:
+        key, buf, pos = decode(buf, pos)
+        buf, pos = skip(buf, pos)
+        if buf[pos] != ":":
+            raise ValueError("Expecting ':' delimiter")
+        buf, pos = skip(buf, pos + 1)
+        value, buf, pos = decode(buf, pos)
+        yield key, value
+        buf, pos = skip(buf, pos)
+        if buf[pos] == "}":
+            return
+        if buf[pos] != ",":
+            raise ValueError("Expecting ',' delimiter")
+        buf, pos = skip(buf, pos + 1)
+
+
+def native_dict(obj):
+    """returns a dictionary of the attributes of obj keeping the datetimes"""
+    new_dict = dict(obj.attributes())
+    new_dict.pop("_sa_instance_state", None)
+    new_dict["__class__"] = obj.__class__.__name__
+    return new_dict
+
+
+def parse_dates(record):
+    """returns record with its created_at and updated_at as datetimes"""
+    record = dict(record)
+    for key in dates:
+        if isinstance(record.get(key), str):
+            record[key] = parse_time(record[key])
+    return record
+
+
+class JSONCodec:
+    """stores the objects as one JSON object keyed by <class name>.id"""
+    name = "json"
+    extension = "json"
+    binary = False
+
+    def record(self, obj):
+        """returns the dictionary stored for obj"""
+        return obj.to_dict()
+
+    def encode(self, record):
+        """returns record as stored by this codec"""
+        return {key: format_time(value) if isinstance(value, datetime)
+                else value for key, value in record.items()}
+
+    def dumps(self, key, record):
+        """returns the (key, record) pair as written in the file"""
+        return json.dumps(key) + ": " + json.dumps(record)
+
+    def write(self, fragments, f):
+        """writes the pairs returned by dumps() to the file f"""
+        f.write("{")
+        sep = ""
+        for fragment in fragments:
+            f.write(sep + fragment)
+            sep = ", "
+        f.write("}")
+
+    def dump(self, items, f):
+        """writes the (key, record) pairs of items to the file f"""
+        self.write((self.dumps(key, record) for key, record in items), f)
+
+    def load(self, f):
+        """yields the (key, record) pairs stored in the file f"""
+        return iter_json_object(f)
+
+
+class PickleCodec:
+    """stores the objects as a sequence of pickled (key, record) pairs"""
+    name = "pickle"
+    extension = "pickle"
+    binary = True
+
+    def record(self, obj):
+        """returns the dictionary stored for obj"""
+        return native_dict(obj)
+
+    def encode(self, record):
+        """returns record as stored by this codec"""
+        return record
+
+    def dumps(self, key, record):
+        """returns the (key, record) pair as written in the file"""
+        return pickle.dumps((key, record), protocol=5)
+
+    def write(self, fragments, f):
+        """writes the pairs returned by dumps() to the file f"""
+        for fragment in fragments:
+            f.write(fragment)
+
+    def dump(self, items, f):
+        """writes the (key, record) pairs of items to the file f"""
+        self.write((self.dumps(key, record) for key, record in items), f)
+
+    def load(self, f):
+        """yields the (key, record) pairs stored in the file f"""
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+class MarshalCodec:
+    """stores the objects as a sequence of marshalled (key, record) pairs,
+    with the datetimes as microseconds since the epoch"""
+    name = "marshal"
+    extension = "marshal"
+    binary = True
+
+    def record(self, obj):
+        """returns the dictionary stored for obj"""
+        return self.encode(native_dict(obj))
+
+    def encode(self, record):
+        """returns record as stored by this codec"""
+        record = dict(record)
+        for key in dates:
+            if isinstance(record.get(key), datetime):
+                record[key] = (record[key] - epoch) // timedelta(
+                    microseconds=1)
+        return record
+
+    def decode(self, record):
+        """returns the record read from a file as FileStorage expects it"""
+        for key in dates:
+            if isinstance(record.get(key), int):
+                record[key] = epoch + timedelta(microseconds=record[key])
+        return record
+
+    def dumps(self, key, record):
+        """returns the (key, record) pair as written in the file"""
+        return marshal.dumps((key, record))
+
+    def write(self, fragments, f):
+        """writes the pairs returned by dumps() to the file f"""
+        for fragment in fragments:
+            f.write(fragment)
+
+    def dump(self, items, f):
+        """writes the (key, record) pairs of items to the file f"""
+        self.write((self.dumps(key, record) for key, record in items), f)
+
+    def load(self, f):
+        """yields the (key, record) pairs stored in the file f"""
+        while True:
+            try:
+                key, record = marshal.load(f)
+            except EOFError:
+                return
+            yield key, self.decode(record)
+
+
+class MsgpackCodec(MarshalCodec):
+    """stores the objects as a sequence of MessagePack [key, record] arrays,
+    with the datetimes as microseconds since the epoch"""
+    name = "msgpack"
+    extension = "msgpack"
+
+    def dumps(self, key, record):
+        """returns the (key, record) pair as written in the file"""
+        return msgpack.packb([key, record])
+
+    def load(self, f):
+        """yields the (key, record) pairs stored in the file f"""
+        for key, record in msgpack.Unpacker(f, raw=False):
+            yield key, self.decode(record)
+
+
+codecs = {"json": JSONCodec(), "pickle": PickleCodec(),
+          "marshal": MarshalCodec(), "msgpack": MsgpackCodec()}
+
+
+def get_codec(name):
+    """returns the codec called name"""
+    if name not in codecs:
+        raise ValueError("Unknown codec: {}".format(name))
+    if name == "msgpack" and msgpack is None:
+        raise ImportError("The msgpack codec needs the msgpack package")
+    return codecs[name]
+
+
+def convert(src_path, src_codec, dst_path, dst_codec):
+    """rewrites the objects stored in src_path with src_codec to dst_path
+    with dst_codec, one object at a time"""
+    src = get_codec(src_codec)
+    dst = get_codec(dst_codec)
+    with open(src_path, "rb" if src.binary else "r") as src_f:
+        with open(dst_path, "wb" if dst.binary else "w") as dst_f:
+            dst.dump(((key, dst.encode(parse_dates(record)))
+                      for key, record in src.load(src_f)), dst_f)
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) != 5:
+        print("Usage: {} SRC SRC_CODEC DST DST_CODEC".format(sys.argv[0]))
+        sys.exit(1)
+    convert(*sys.argv[1:])
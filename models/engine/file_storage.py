@@ -3,78 +3,880 @@
 Contains the FileStorage class
 """
 
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import copy
+from datetime import datetime
 import json
+import logging
 from models.amenity import Amenity
-from models.base_model import BaseModel
+from models.base_model import BaseModel, compact, format_time
 from models.city import City
+from models.engine.file_codecs import get_codec
 from models.place import Place
 from models.review import Review
 from models.state import State
 from models.user import User
+import os
+from os import getenv
+import threading
+import time
+import zlib
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
+log = logging.getLogger(__name__)
 
 
 class FileStorage:
     """serializes instances to a JSON file & deserializes back to instances"""
 
+    # codec - encoding of the objects in the file, JSON unless another one
+    # is picked by name through HBNB_FILE_CODEC
+    __codec = get_codec(getenv("HBNB_FILE_CODEC", "json"))
     # string - path to the JSON file
-    __file_path = "file.json"
+    __file_path = "file." + __codec.extension
     # dictionary - empty but will store all objects by <class name>.id
     __objects = {}
+    # dictionary - <class name> to the {<class name>.id: obj} of that class
+    __by_class = {}
+    # dictionary - (<class name>, <attribute>_id) to the {<class name>.id:
+    # obj} of the objects of that class by value of that attribute, and
+    # <class name>.id to the ((<attribute>_id, value), ...) indexed for it
+    __related = {}
+    __links = {}
+    # dictionary - <class name>.id to a copy of the list and dict attributes
+    # of the stored objects that have some, as they were last read or
+    # written, to find the ones changed in place
+    __mutable = {}
+    # tuple - (inode, size, mtime) of the JSON file and of the journal when
+    # they were last read or written
+    __file_stat = None
+    # dictionary - <class name>.id to the updated_at found in the JSON file,
+    # in the time format whichever way the codec stores it
+    __synced = {}
+    # set - <class name>.id of the objects added, changed or deleted since
+    # last save
+    __dirty = set()
+    # dictionary - the __objects whose keys are the ones in __synced apart
+    # from the keys in __dirty, which the writers keep that way
+    __synced_with = None
+    # journal mode - save() appends the changed objects to a JSON lines file
+    # which is folded back into the JSON file past __journal_max records
+    __journal = getenv("HBNB_FILE_JOURNAL") == "1"
+    __journal_path = __file_path + ".journal"
+    __journal_max = int(getenv("HBNB_FILE_JOURNAL_MAX", 1000))
+    __journal_len = 0
+    # lazy mode - reload() keeps the dictionaries read from the JSON file in
+    # __pending, by class name, and builds an object the first time it is
+    # looked up through all() or get()
+    __lazy = getenv("HBNB_FILE_LAZY") == "1"
+    __pending = {}
+    # sharded mode - the objects are stored in __shards_path, one JSON file
+    # per class split in __shards buckets by id, and save() only rewrites the
+    # files holding changed objects. reload() may then read only the classes
+    # listed in __load_classes
+    __shards = int(getenv("HBNB_FILE_SHARDS", 0))
+    __shards_path = __file_path + ".d"
+    __load_classes = getenv("HBNB_FILE_CLASSES")
+    if __load_classes:
+        __load_classes = __load_classes.split(",")
+    # processes sharing the file hold an advisory lock on __lock_path while
+    # they read or write it. The lock file holds a generation number bumped
+    # by every save, so they notice each other's writes
+    __lock_path = __file_path + ".lock"
+    __generation = None
+    # lock - held by the threads changing __objects or writing the file
+    __lock = threading.RLock()
+    # write-behind mode - save() returns a future of the write that a
+    # background thread makes once for all the saves of a __flush_ms window
+    __flush_ms = int(getenv("HBNB_FILE_FLUSH_MS", 0))
+    __flusher = None
+    __flush_future = None
+    # batch - thread running a batch() block and keys it added or deleted
+    __batch_owner = None
+    __batch_keys = None
+    # copy-on-write - all() hands out __objects itself and flags it as
+    # __shared, so the next writer changes a copy that replaces it instead.
+    # While a writer changes __objects in place (__writing) all() returns a
+    # copy. reload() makes its changes in copies of __objects and of the
+    # dictionaries of __by_class (__staged) that replace them once it is done
+    __shared = False
+    __writing = False
+    __staged = None
 
-    def all(self, cls=None):
-        """returns the dictionary __objects"""
-        if cls is not None:
-            new_dict = {}
-            for key, value in self.__objects.items():
-                if cls == value.__class__ or cls == value.__class__.__name__:
-                    new_dict[key] = value
-            return new_dict
+    @staticmethod
+    def _class_name(cls):
+        """returns the class name of cls, which is a class or its name"""
+        if isinstance(cls, str):
+            return cls
+        return cls.__name__
+
+    def _objects(self):
+        """returns the dictionary of objects the writers change"""
+        if self.__staged is not None:
+            return self.__staged[0]
         return self.__objects
 
+    def _class_objects(self, name):
+        """returns the {<class name>.id: obj} of class name the writers
+        change"""
+        if self.__staged is None:
+            return self.__by_class.setdefault(name, {})
+        by_class = self.__staged[1]
+        if name not in by_class:
+            by_class[name] = dict(self.__by_class.get(name, {}))
+        return by_class[name]
+
+    def _store(self, key, obj=None):
+        """puts obj at key in the dictionary of objects, or takes the object
+        at key out of it when obj is None, and returns the object that was
+        at key. A dictionary handed out by all() is copied first"""
+        if self.__staged is not None:
+            objects = self.__staged[0]
+        else:
+            FileStorage.__writing = True
+            objects = self.__objects
+            if self.__shared:
+                FileStorage.__shared = False
+                objects = dict(objects)
+        try:
+            old = objects.get(key)
+            if obj is None:
+                objects.pop(key, None)
+            else:
+                objects[key] = obj
+        finally:
+            FileStorage.__writing = False
+        if self.__staged is None and objects is not self.__objects:
+            if self.__synced_with is self.__objects:
+                FileStorage.__synced_with = objects
+            FileStorage.__objects = objects
+        return old
+
+    @contextmanager
+    def _staging(self):
+        """makes the writers of the block change copies of __objects and of
+        the dictionaries of __by_class, which replace them at the end of the
+        block. If the block raises, the copies are dropped and the objects
+        stay as they were"""
+        if self.__staged is not None:
+            yield
+            return
+        FileStorage.__staged = (dict(self.__objects), {})
+        pending = {name: dict(records)
+                   for name, records in self.__pending.items()}
+        try:
+            yield
+        except BaseException:
+            FileStorage.__staged = None
+            FileStorage.__pending = pending
+            self._reindex()
+            raise
+        objects, by_class = self.__staged
+        FileStorage.__staged = None
+        if by_class:
+            merged = dict(self.__by_class)
+            merged.update(by_class)
+            FileStorage.__by_class = merged
+        if self.__synced_with is self.__objects:
+            FileStorage.__synced_with = objects
+        FileStorage.__shared = False
+        FileStorage.__objects = objects
+
+    def _add(self, key, obj):
+        """puts obj in __objects and in the indexes"""
+        name = obj.__class__.__name__
+        self._store(key, obj)
+        self._class_objects(name)[key] = obj
+        self._index(key, obj)
+        self._track(key, obj)
+
+    def _index(self, key, obj):
+        """puts obj in the indexes by foreign key"""
+        name = obj.__class__.__name__
+        self._unlink(key)
+        links = tuple((attr, value) for attr, value in obj.attributes().items()
+                      if attr.endswith("_id") and isinstance(value, str) and
+                      value)
+        for attr, value in links:
+            related = self.__related.setdefault((name, attr), {})
+            related.setdefault(value, {})[key] = obj
+        if links:
+            self.__links[key] = links
+
+    def _remove(self, key):
+        """takes the object stored at key out of __objects and the indexes"""
+        obj = self._store(key)
+        self._class_objects(obj.__class__.__name__).pop(key, None)
+        self._unlink(key)
+        self.__mutable.pop(key, None)
+
+    def _reindex(self):
+        """builds the indexes by foreign key and the copies of the mutable
+        attributes again from __objects"""
+        FileStorage.__related = {}
+        FileStorage.__links = {}
+        FileStorage.__mutable = {}
+        for key, obj in self.__objects.items():
+            self._index(key, obj)
+            self._track(key, obj)
+
+    def _track(self, key, obj):
+        """keeps a copy of the list and dict attributes of obj, which can
+        change in place without being set"""
+        values = {attr: copy.deepcopy(value)
+                  for attr, value in obj.attributes().items()
+                  if isinstance(value, (list, dict))}
+        if values:
+            self.__mutable[key] = values
+        else:
+            self.__mutable.pop(key, None)
+
+    def _set_changed_in_place(self):
+        """sets again the list and dict attributes changed in place since
+        their objects were last read or written, so that they count as
+        changed"""
+        for key, values in list(self.__mutable.items()):
+            obj = self.__objects.get(key)
+            if obj is None:
+                continue
+            for attr, value in values.items():
+                current = getattr(obj, attr, None)
+                if current != value:
+                    setattr(obj, attr, current)
+
+    def _unlink(self, key):
+        """takes the object stored at key out of the indexes by foreign key"""
+        name = key.split(".", 1)[0]
+        for attr, value in self.__links.pop(key, ()):
+            related = self.__related.get((name, attr), {})
+            children = related.get(value)
+            if children is not None:
+                children.pop(key, None)
+                if not children:
+                    del related[value]
+
+    def _load(self, key, record):
+        """puts the object described by record at key, or keeps record in
+        __pending until the object is looked up in lazy mode"""
+        name = record["__class__"]
+        if self.__lazy:
+            if key in self._objects():
+                self._remove(key)
+            self.__pending.setdefault(name, {})[key] = record
+        else:
+            self._add(key, self._build(name, record))
+
+    @staticmethod
+    def _build(name, record):
+        """returns the object of class name described by record, as stored"""
+        return classes[name].from_dict(record)
+
+    def _discard(self, key):
+        """forgets the object or the pending dictionary stored at key"""
+        if key in self._objects():
+            self._remove(key)
+        else:
+            self.__pending.get(key.split(".", 1)[0], {}).pop(key, None)
+
+    def _hydrate(self, name, key=None):
+        """builds the pending objects of class name, or only the one at key"""
+        if not self.__pending.get(name):
+            return
+        with self.__lock:
+            pending = self.__pending.get(name, {})
+            if key is None:
+                records = self.__pending.pop(name, {})
+            elif key in pending:
+                records = {key: pending.pop(key)}
+            else:
+                return
+            for obj_key, record in records.items():
+                self._add(obj_key, self._build(name, record))
+
+    def all(self, cls=None, load=(), strategy="selectin"):
+        """returns the dictionary __objects
+
+        The dictionary is not changed afterwards: the writers change a copy
+        of it instead, so it can be iterated while other threads save.
+        load and strategy are there for DBStorage: the relationships are
+        looked up in the foreign key index here"""
+        if cls is not None:
+            name = self._class_name(cls)
+            self._hydrate(name)
+            return dict(self.__by_class.get(name, {}))
+        for name in list(self.__pending):
+            self._hydrate(name)
+        while True:
+            FileStorage.__shared = True
+            objects = self.__objects
+            if self.__shared:
+                break
+        if self.__writing:
+            return dict(objects)
+        return objects
+
     def new(self, obj):
-        """sets in __objects the obj with key <obj class name>.id"""
+        """sets in __objects the obj with key <obj class name>.id
+
+        Nothing is done when obj is already stored and unchanged"""
         if obj is not None:
-            key = obj.__class__.__name__ + "." + obj.id
-            self.__objects[key] = obj
+            name = obj.__class__.__name__
+            key = name + "." + obj.id
+            with self.__lock:
+                stored = self._objects().get(key)
+                if stored is obj and not obj.changed_fields():
+                    return
+                if stored is not None and stored is not obj:
+                    obj.mark_saved(False)
+                self.__pending.get(name, {}).pop(key, None)
+                self._add(key, obj)
+                self.__dirty.add(key)
+                if self.__batch_keys is not None:
+                    self.__batch_keys.add(key)
+
+    def changed(self, obj, name):
+        """marks obj to be written by the next save if it is stored, and
+        indexes it again when its attribute name is a foreign key. Called by
+        the saved objects when they change for the first time and by every
+        object when a foreign key is set"""
+        obj_id = getattr(obj, "id", None)
+        if type(obj_id) is not str:
+            return
+        key = obj.__class__.__name__ + "." + obj_id
+        with self.__lock:
+            if self._objects().get(key) is obj:
+                self.__dirty.add(key)
+                if name.endswith("_id"):
+                    self._index(key, obj)
+
+    def _stat(self):
+        """returns the (inode, size, mtime) of the JSON file, or of the
+        directory of shards, and of the journal"""
+        file_stat = []
+        path = self.__shards_path if self.__shards else self.__file_path
+        for path in (path, self.__journal_path):
+            try:
+                st = os.stat(path)
+            except OSError:
+                file_stat.append(None)
+                continue
+            file_stat.append((st.st_ino, st.st_size, st.st_mtime_ns))
+        return tuple(file_stat)
+
+    @contextmanager
+    def _locked(self, exclusive=True):
+        """holds the lock shared by the processes using the file and yields
+        the lock file, or None where locks are not available. A shared lock
+        is not taken, and the lock file not created, while there are no
+        files to read"""
+        if fcntl is None or (not exclusive and
+                             self._stat() == (None, None)):
+            yield None
+            return
+        with open(self.__lock_path, 'a+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield f
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _read_generation(lock):
+        """returns the generation number written in the lock file"""
+        if lock is None:
+            return None
+        lock.seek(0)
+        return int(lock.read() or 0)
 
     def save(self):
-        """serializes __objects to the JSON file (path: __file_path)"""
-        json_objects = {}
-        for key in self.__objects:
-            json_objects[key] = self.__objects[key].to_dict()
-        with open(self.__file_path, 'w') as f:
-            json.dump(json_objects, f)
+        """serializes __objects to the JSON file (path: __file_path)
 
-    def reload(self):
-        """deserializes the JSON file to __objects"""
+        In write-behind mode the write is left to a background thread and
+        the future of that write is returned. Inside a batch() block the
+        write is left to the end of the block"""
+        if self.__batch_owner == threading.get_ident():
+            return None
+        if not self.__flush_ms:
+            self.flush()
+            return None
+        with self.__lock:
+            if self.__flush_future is None:
+                if self.__flusher is None:
+                    FileStorage.__flusher = ThreadPoolExecutor(
+                        1, thread_name_prefix="FileStorage")
+                FileStorage.__flush_future = self.__flusher.submit(
+                    self._flush_later)
+            return self.__flush_future
+
+    @contextmanager
+    def batch(self):
+        """makes the saves of the block one write at its end, or undoes the
+        objects added or deleted in the block if it raises
+
+        The other threads wait for the block to end before changing any
+        object. Changes made to objects that are not passed to new() or
+        delete() in the block are not undone"""
+        with self.__lock:
+            if self.__batch_owner is not None:
+                yield self
+                return
+            self.flush()
+            FileStorage.__batch_owner = threading.get_ident()
+            FileStorage.__batch_keys = set()
+            try:
+                yield self
+            except BaseException:
+                self._rollback(self.__batch_keys)
+                raise
+            finally:
+                FileStorage.__batch_owner = None
+                FileStorage.__batch_keys = None
+            self.flush()
+
+    def _rollback(self, keys):
+        """puts back the objects at keys as they are in the files"""
+        journal, patches = self._read_journal()[:2]
+        records = {key: record for key, record
+                   in self._iter_records(journal, patches) if key in keys}
+        with self._staging():
+            for key in keys:
+                if key in records:
+                    self._load(key, records[key])
+                else:
+                    self._discard(key)
+        self.__dirty.difference_update(keys)
+
+    def _flush_later(self):
+        """waits for the saves of the write-behind window then writes them"""
+        time.sleep(self.__flush_ms / 1000)
+        with self.__lock:
+            FileStorage.__flush_future = None
+            self.flush()
+
+    def flush(self):
+        """writes the changes to the JSON file and returns once they are on
+        disk
+
+        The changes saved by other processes since the last reload are
+        merged first, and nothing is written if they cannot be read.
+        Nothing is written when no object was added, deleted or changed
+        since the last save. In journal mode only the objects added, updated
+        or deleted since the last save are appended to the journal"""
+        with self.__lock, self._locked() as lock:
+            self._set_changed_in_place()
+            generation = self._read_generation(lock)
+            if generation != self.__generation:
+                self._refresh(True)
+            if not self.__dirty and self._in_sync():
+                FileStorage.__generation = generation
+                return
+            self._touch()
+            if (self.__journal and self.__journal_len +
+                    len(self.__dirty) <= self.__journal_max):
+                self._append_journal()
+            elif self.__shards and self._in_sync(self.__dirty):
+                self._write_snapshot(self.__dirty)
+            else:
+                self._write_snapshot()
+            self.__dirty.clear()
+            FileStorage.__file_stat = self._stat()
+            if lock is not None:
+                generation += 1
+                lock.truncate(0)
+                lock.write(str(generation))
+                lock.flush()
+            FileStorage.__generation = generation
+
+    def _touch(self):
+        """sets updated_at on the objects changed since they were last read
+        or written without it, which is how the other processes tell that
+        an object changed"""
+        now = datetime.utcnow()
+        for key in list(self.__dirty):
+            obj = self.__objects.get(key)
+            if obj is None:
+                continue
+            changed = obj.changed_fields()
+            if changed and "updated_at" not in changed:
+                obj.updated_at = now
+
+    def _in_sync(self, dirty=()):
+        """tells whether the stored keys of the classes reload() reads are
+        the ones in the JSON file, apart from the keys in dirty
+
+        The keys are only compared when __objects was replaced from outside
+        the storage, which keeps them in sync afterwards"""
+        if self.__synced_with is self.__objects:
+            return True
+        objects = [key for key in self.__objects if self._loads(key)]
+        pending = sum(len(records) for records in self.__pending.values())
+        added = sum(1 for key in dirty if self._loads(key) and
+                    key in self.__objects and key not in self.__synced)
+        removed = sum(1 for key in dirty
+                      if key not in self.__objects and key in self.__synced)
+        if len(objects) + pending - added != len(self.__synced) - removed:
+            return False
+        if not all(key in self.__synced or key in dirty for key in objects):
+            return False
+        FileStorage.__synced_with = self.__objects
+        return True
+
+    def _write_file(self, path, fragments):
+        """writes the objects as returned by _fragment() to a temporary file
+        that replaces the file at path once it is on disk"""
+        tmp_path = "{}.{}.tmp".format(path, os.getpid())
         try:
-            with open(self.__file_path, 'r') as f:
-                jo = json.load(f)
-            for key in jo:
-                self.__objects[key] = classes[jo[key]["__class__"]](**jo[key])
-        except Exception:
-            pass
+            with open(tmp_path, 'wb' if self.__codec.binary else 'w') as f:
+                self.__codec.write(fragments, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _fragment(self, key, obj):
+        """returns the updated_at written for obj and obj as written in the
+        file, which is cached on obj until one of its fields changes, except
+        in compact mode. The fields changed in place are found by flush()"""
+        codec = self.__codec
+        cached = getattr(obj, "_fragment", None)
+        if (cached is None or cached[0] is not codec or
+                obj.changed_fields()):
+            obj.mark_saved()
+            self._track(key, obj)
+            cached = (codec, self._stamp(getattr(obj, "updated_at", None)),
+                      codec.dumps(key, codec.record(obj)))
+            if not compact:
+                obj._fragment = cached
+        return cached[1], cached[2]
+
+    def _record_fragment(self, key, record):
+        """returns the updated_at written for record and record as written in
+        the file"""
+        return (self._stamp(record.get("updated_at")),
+                self.__codec.dumps(key, self.__codec.encode(record)))
+
+    @staticmethod
+    def _stamp(updated_at):
+        """returns updated_at, a datetime or the text of one, as recorded in
+        __synced"""
+        if isinstance(updated_at, datetime):
+            return format_time(updated_at)
+        return updated_at
+
+    def _write_fragments(self, path, fragments):
+        """writes the (updated_at, fragment) of fragments, by key, to the
+        file at path and records the ones of the classes reload() reads as
+        synced"""
+        self._write_file(path, (fragment for updated_at, fragment
+                                in fragments.values()))
+        for key, (updated_at, fragment) in fragments.items():
+            if self._loads(key):
+                self.__synced[key] = updated_at
+
+    def _write_snapshot(self, keys=None):
+        """writes every object to the JSON file, or the objects at keys to
+        their shards in sharded mode, then empties the journal
+
+        Only the objects changed since they were last written are encoded
+        again"""
+        if self.__shards:
+            self._write_shards(None if self.__journal_len else keys)
+        else:
+            fragments = {}
+            for key, obj in self.__objects.items():
+                fragments[key] = self._fragment(key, obj)
+            for records in self.__pending.values():
+                for key, record in records.items():
+                    fragments[key] = self._record_fragment(key, record)
+            FileStorage.__synced = {}
+            self._write_fragments(self.__file_path, fragments)
+        FileStorage.__synced_with = self.__objects
+        if os.path.exists(self.__journal_path):
+            os.remove(self.__journal_path)
+        FileStorage.__journal_len = 0
+
+    def _shard(self, key):
+        """returns the name of the shard file holding the object at key"""
+        name, obj_id = key.split(".", 1)
+        if self.__shards == 1:
+            return "{}.{}".format(name, self.__codec.extension)
+        bucket = zlib.crc32(obj_id.encode("utf-8")) % self.__shards
+        return "{}.{}.{}".format(name, bucket, self.__codec.extension)
+
+    def _shard_files(self):
+        """returns the names of the shard files of the classes reload()
+        reads"""
+        if not os.path.isdir(self.__shards_path):
+            return []
+        extension = "." + self.__codec.extension
+        return [shard for shard in sorted(os.listdir(self.__shards_path))
+                if shard.endswith(extension) and self._loads(shard)]
+
+    def _write_shards(self, keys=None):
+        """rewrites the shards holding the objects at keys, keeping the
+        other objects of those shards, or every shard when keys is None
+
+        Only the classes reload() reads are rewritten from memory, the
+        shards of the other classes are merged with the objects changed in
+        them"""
+        codec = self.__codec
+        os.makedirs(self.__shards_path, exist_ok=True)
+        if keys is None:
+            shards = {shard: {} for shard in self._shard_files()}
+            for key, obj in self.__objects.items():
+                if self._loads(key):
+                    shard = shards.setdefault(self._shard(key), {})
+                    shard[key] = self._fragment(key, obj)
+            for records in self.__pending.values():
+                for key, record in records.items():
+                    shards.setdefault(self._shard(key), {})[key] = (
+                        self._record_fragment(key, record))
+            FileStorage.__synced = {}
+            for shard, fragments in shards.items():
+                self._write_fragments(os.path.join(self.__shards_path, shard),
+                                      fragments)
+            keys = [key for key in self.__dirty if not self._loads(key)]
+        shards = {}
+        for key in keys:
+            shards.setdefault(self._shard(key), []).append(key)
+        for shard, shard_keys in shards.items():
+            path = os.path.join(self.__shards_path, shard)
+            fragments = {}
+            if os.path.exists(path):
+                with open(path, 'rb' if codec.binary else 'r') as f:
+                    for key, record in codec.load(f):
+                        if key in self.__objects:
+                            fragments[key] = self._fragment(
+                                key, self.__objects[key])
+                        else:
+                            fragments[key] = self._record_fragment(key,
+                                                                   record)
+            for key in shard_keys:
+                if key in self.__objects:
+                    fragments[key] = self._fragment(key, self.__objects[key])
+                else:
+                    fragments.pop(key, None)
+                    self.__synced.pop(key, None)
+            self._write_fragments(path, fragments)
+
+    def _append_journal(self):
+        """appends a line per object changed since the last save to the
+        journal, with a null value for the deleted ones. Only the changed
+        fields are written for an object already stored"""
+        lines = []
+        for key in self.__dirty:
+            obj = self.__objects.get(key)
+            if obj is None:
+                self.__synced.pop(key, None)
+                lines.append(json.dumps({"key": key, "value": None}) + "\n")
+                continue
+            changed = obj.changed_fields()
+            stored = key in self.__synced
+            if stored and not changed:
+                continue
+            obj.mark_saved()
+            self._track(key, obj)
+            value = obj.to_dict()
+            self.__synced[key] = value.get("updated_at")
+            if (stored and changed.issubset(value) and
+                    len(changed) < len(obj.attributes())):
+                entry = {"key": key,
+                         "fields": {name: value[name] for name in changed}}
+            else:
+                entry = {"key": key, "value": value}
+            lines.append(json.dumps(entry) + "\n")
+        with open(self.__journal_path, 'a+b') as f:
+            self._cut_torn_line(f)
+            f.write("".join(lines).encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        FileStorage.__journal_len += len(lines)
+
+    @staticmethod
+    def _cut_torn_line(f, chunk_size=4096):
+        """truncates the journal open as f after its last complete line, so
+        that a line cut short by a crash does not swallow the next append"""
+        end = pos = f.seek(0, os.SEEK_END)
+        while pos > 0:
+            start = max(pos - chunk_size, 0)
+            f.seek(start)
+            newline = f.read(pos - start).rfind(b"\n")
+            if newline >= 0:
+                pos = start + newline + 1
+                break
+            pos = start
+        if pos != end:
+            f.truncate(pos)
+
+    def _read_journal(self):
+        """returns the last value written to the journal for each key, None
+        for the deleted ones, the fields written for the keys whose value is
+        only in the JSON file, and the number of lines in the journal"""
+        journal = {}
+        patches = {}
+        journal_len = 0
+        if os.path.exists(self.__journal_path):
+            with open(self.__journal_path, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # the last append was cut short
+                        break
+                    journal_len += 1
+                    key = entry["key"]
+                    if "fields" not in entry:
+                        journal[key] = entry["value"]
+                        patches.pop(key, None)
+                    elif key in journal:
+                        if journal[key] is not None:
+                            journal[key] = dict(journal[key],
+                                                **entry["fields"])
+                    else:
+                        patches[key] = dict(patches.get(key, {}),
+                                            **entry["fields"])
+        return journal, patches, journal_len
+
+    def _iter_records(self, journal, patches):
+        """yields the <class name>.id and dictionary of each object stored in
+        the JSON file, one at a time, with the journal replayed over them"""
+        if self.__shards:
+            paths = [os.path.join(self.__shards_path, shard)
+                     for shard in self._shard_files()]
+        else:
+            paths = [self.__file_path]
+        for path in paths:
+            if os.path.exists(path):
+                with open(path, 'rb' if self.__codec.binary else 'r') as f:
+                    for key, record in self.__codec.load(f):
+                        if key in patches:
+                            yield key, dict(record, **patches[key])
+                        elif key not in journal:
+                            yield key, record
+        for key, record in journal.items():
+            if record is not None and self._loads(key):
+                yield key, record
+
+    def _loads(self, name):
+        """tells whether reload() reads the objects of the class that name,
+        a shard file name or a <class name>.id, starts with. Every class is
+        read unless in sharded mode without a journal"""
+        if not self.__load_classes or not self.__shards or self.__journal:
+            return True
+        return name.split(".", 1)[0] in self.__load_classes
+
+    def reload(self):
+        """deserializes the JSON file to __objects
+
+        Nothing is parsed when the files are unchanged since they were last
+        read or written. Otherwise the file is read one object at a time,
+        only the objects whose updated_at differs are rebuilt, and the ones
+        removed from the file are dropped. When the files cannot be read the
+        objects are kept as they are"""
+        with self.__lock, self._locked(False) as lock:
+            generation = self._read_generation(lock)
+            try:
+                self._refresh(generation != self.__generation)
+            except Exception as error:
+                log.warning("could not read %s: %s", self.__file_path, error)
+                return
+            FileStorage.__generation = generation
+
+    def _refresh(self, force=False):
+        """merges the changes made to the files into __objects, keeping the
+        objects added or deleted since the last save. Nothing is changed if
+        the files cannot be read"""
+        file_stat = self._stat()
+        if file_stat == (None, None):
+            return
+        if file_stat == self.__file_stat and not force:
+            return
+        synced = {}
+        journal, patches, journal_len = self._read_journal()
+        with self._staging():
+            for key, record in self._iter_records(journal, patches):
+                synced[key] = self._stamp(record.get("updated_at"))
+                if key in self.__dirty:
+                    continue
+                if (self.__synced.get(key) == synced[key] and
+                        self._has(key)):
+                    continue
+                self._load(key, record)
+            for key in self.__synced:
+                if key not in synced and key not in self.__dirty:
+                    self._discard(key)
+        FileStorage.__synced = synced
+        FileStorage.__journal_len = journal_len
+        FileStorage.__file_stat = file_stat
+
+    def _has(self, key):
+        """tells whether an object or a pending dictionary is at key"""
+        if key in self._objects():
+            return True
+        return key in self.__pending.get(key.split(".", 1)[0], {})
 
     def delete(self, obj=None):
         """delete obj from __objects if it’s inside"""
         if obj is not None:
             key = obj.__class__.__name__ + '.' + obj.id
-            if key in self.__objects:
-                del self.__objects[key]
+            with self.__lock:
+                if key in self._objects():
+                    obj.mark_saved(False)
+                    self._remove(key)
+                    self.__dirty.add(key)
+                    if self.__batch_keys is not None:
+                        self.__batch_keys.add(key)
 
     def close(self):
-        """call reload() method for deserializing the JSON file to objects"""
+        """call reload() method to pick up changes made to the JSON file"""
         self.reload()
 
-    def get(self, cls, id):
-        """Retrieves a specific object based on cls and id"""
-        key = "{}.{}".format(cls.__name__, id)
-        return self.all(cls).get(key)
+    def get(self, cls, id, load=(), strategy="joined"):
+        """Retrieves a specific object based on cls and id, load and
+        strategy being there for DBStorage"""
+        name = self._class_name(cls)
+        key = "{}.{}".format(name, id)
+        self._hydrate(name, key)
+        return self.__by_class.get(name, {}).get(key)
+
+    def get_many(self, cls, ids):
+        """Retrieves the objects of cls whose ids are in ids, in the order of
+        ids and leaving out the missing ones"""
+        name = self._class_name(cls)
+        keys = ["{}.{}".format(name, obj_id) for obj_id in ids]
+        for key in keys:
+            self._hydrate(name, key)
+        objects = self.__by_class.get(name, {})
+        return [objects[key] for key in keys if key in objects]
+
+    def related(self, cls, attr, value):
+        """Returns the list of objects of cls whose attribute attr, ending
+        with _id, is value"""
+        name = self._class_name(cls)
+        self._hydrate(name)
+        related = self.__related.get((name, attr), {}).get(value, {})
+        return [obj for obj in list(related.values())
+                if getattr(obj, attr, None) == value]
 
     def count(self, cls=None):
         """Returns the number of objects in storage matching the given class
         If no class is passed, returns the number of all objects in storage"""
-        return len(self.all(cls))
+        if cls is None:
+            return len(self.__objects) + sum(
+                len(records) for records in self.__pending.values())
+        name = self._class_name(cls)
+        return (len(self.__by_class.get(name, {})) +
+                len(self.__pending.get(name, {})))
+
+    def count_by_class(self):
+        """Returns the number of objects of each class, by class name"""
+        return {name: self.count(name) for name in classes}
@@ -0,0 +1,282 @@
+#!/usr/bin/python3
+"""
+Contains the class SQLiteStorage
+"""
+
+from contextlib import contextmanager
+import json
+from models.amenity import Amenity
+from models.base_model import BaseModel
+from models.city import City
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+from os import getenv
+import sqlite3
+import threading
+
+classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
+           "Place": Place, "Review": Review, "State": State, "User": User}
+# columns - indexed copies of the foreign keys of each class
+foreign_keys = {"City": ("state_id",), "Place": ("city_id", "user_id"),
+                "Review": ("place_id", "user_id")}
+
+
+class SQLiteStorage:
+    """interacts with a SQLite database file"""
+    __db_path = None
+    __local = None
+
+    def __init__(self):
+        """Instantiate a SQLiteStorage object"""
+        self.__db_path = getenv('HBNB_SQLITE_DB', 'hbnb.db')
+        self.__local = threading.local()
+        if getenv('HBNB_ENV') == "test":
+            conn = sqlite3.connect(self.__db_path)
+            for name in classes:
+                conn.execute('DROP TABLE IF EXISTS "{}"'.format(name))
+            conn.commit()
+            conn.close()
+
+    def _conn(self):
+        """returns the connection of the current thread, opening it if
+        needed"""
+        conn = getattr(self.__local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.__db_path)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.__local.conn = conn
+        return conn
+
+    @staticmethod
+    def _class_name(cls):
+        """returns the class name of cls, which is a class or its name"""
+        if isinstance(cls, str):
+            return cls
+        return cls.__name__
+
+    def _identity(self):
+        """returns the {<class name>.id: obj} of the objects read or written
+        by the current thread since it last closed the storage"""
+        identity = getattr(self.__local, "identity", None)
+        if identity is None:
+            identity = self.__local.identity = {}
+        return identity
+
+    def _build(self, name, obj_id, data):
+        """returns the object of class name stored as data, or the one the
+        current thread already has for it"""
+        key = name + "." + obj_id
+        identity = self._identity()
+        obj = identity.get(key)
+        if obj is None:
+            obj = identity[key] = classes[name].from_dict(json.loads(data))
+        return obj
+
+    def all(self, cls=None, load=(), strategy="selectin"):
+        """query on the current database connection, load and strategy
+        being there for DBStorage"""
+        new_dict = {}
+        for name in classes:
+            if cls is None or self._class_name(cls) == name:
+                rows = self._conn().execute(
+                    'SELECT id, data FROM "{}"'.format(name))
+                for obj_id, data in rows:
+                    new_dict[name + '.' + obj_id] = self._build(name, obj_id,
+                                                                data)
+        return new_dict
+
+    def new(self, obj):
+        """insert or update the object in the current transaction
+
+        Only the changed fields of an object already stored are updated,
+        and nothing is done when it is unchanged"""
+        if obj is None:
+            return
+        self._identity()[obj.__class__.__name__ + "." + obj.id] = obj
+        changed = obj.changed_fields()
+        if not changed:
+            return
+        obj.mark_saved()
+        self._written().append(obj)
+        name = obj.__class__.__name__
+        fks = foreign_keys.get(name, ())
+        value = obj.to_dict()
+        if changed.issubset(value) and len(changed) < len(obj.attributes()):
+            sets = ["data = json_set(data{})".format(
+                ", ?, json(?)" * len(changed))]
+            values = []
+            for field in sorted(changed):
+                values += ['$."{}"'.format(field), json.dumps(value[field])]
+            for fk in fks:
+                if fk in changed:
+                    sets.append("{} = ?".format(fk))
+                    values.append(value[fk])
+            sql = 'UPDATE "{}" SET {} WHERE id = ?'.format(
+                name, ", ".join(sets))
+            cursor = self._conn().execute(sql, values + [obj.id])
+            if cursor.rowcount:
+                return
+        columns = ("id",) + fks + ("data",)
+        values = ([obj.id] + [value.get(fk) for fk in fks] +
+                  [json.dumps(value)])
+        self._conn().execute(
+            'INSERT INTO "{}" ({}) VALUES ({}) ON CONFLICT(id) DO UPDATE '
+            'SET {}'.format(name, ", ".join(columns),
+                            ", ".join("?" * len(columns)),
+                            ", ".join("{0}=excluded.{0}".format(column)
+                                      for column in columns[1:])),
+            values)
+
+    def changed(self, obj, name):
+        """called by the objects when their attribute name changes, which
+        are written and indexed when they are passed to new() again"""
+
+    def _written(self):
+        """returns the objects written in the transaction of the current
+        thread"""
+        written = getattr(self.__local, "written", None)
+        if written is None:
+            written = self.__local.written = []
+        return written
+
+    def _commit(self):
+        """commits the transaction of the current thread"""
+        self._conn().commit()
+        self._written().clear()
+
+    def _rollback(self):
+        """rolls back the transaction of the current thread, after which the
+        objects written in it count as never saved and the objects it reads
+        are built again"""
+        self._conn().rollback()
+        for obj in self._written():
+            obj.mark_saved(False)
+        self._written().clear()
+        self.__local.identity = None
+
+    def save(self):
+        """commit all changes of the current transaction, unless inside a
+        batch() block"""
+        if not getattr(self.__local, "depth", 0):
+            self._commit()
+
+    @contextmanager
+    def batch(self):
+        """commits the changes of the block once at its end, or rolls them
+        back if it raises"""
+        depth = getattr(self.__local, "depth", 0)
+        self.__local.depth = depth + 1
+        try:
+            yield self
+        except BaseException:
+            if not depth:
+                self._rollback()
+            raise
+        finally:
+            self.__local.depth = depth
+        if not depth:
+            self._commit()
+
+    def delete(self, obj=None):
+        """delete obj from the current transaction if not None"""
+        if obj is not None:
+            obj.mark_saved(False)
+            self._identity().pop(
+                obj.__class__.__name__ + "." + obj.id, None)
+            self._conn().execute(
+                'DELETE FROM "{}" WHERE id = ?'.format(
+                    obj.__class__.__name__), (obj.id,))
+
+    def reload(self):
+        """creates the tables and their indexes"""
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        for name in classes:
+            fks = foreign_keys.get(name, ())
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS "{}" (id TEXT PRIMARY KEY, {}'
+                'data TEXT NOT NULL)'.format(
+                    name, "".join(fk + " TEXT, " for fk in fks)))
+            for fk in fks:
+                conn.execute(
+                    'CREATE INDEX IF NOT EXISTS "{0}_{1}" ON "{0}" ({1})'
+                    .format(name, fk))
+        conn.commit()
+
+    def close(self):
+        """roll back the uncommitted changes and close the connection of
+        the current thread, which then forgets the objects it read"""
+        conn = getattr(self.__local, "conn", None)
+        if conn is not None:
+            self._rollback()
+            conn.close()
+            self.__local.conn = None
+
+    def get(self, cls, id, load=(), strategy="joined"):
+        """Retrieves a specific object based on cls and id, without a query
+        when the current thread already has it. load and strategy are there
+        for DBStorage"""
+        name = self._class_name(cls)
+        if name not in classes or id is None:
+            return None
+        obj = self._identity().get(name + "." + id)
+        if obj is not None:
+            return obj
+        row = self._conn().execute(
+            'SELECT data FROM "{}" WHERE id = ?'.format(name),
+            (id,)).fetchone()
+        if row is None:
+            return None
+        return self._build(name, id, row[0])
+
+    def get_many(self, cls, ids):
+        """Retrieves the objects of cls whose ids are in ids, in the order of
+        ids and leaving out the missing ones, with one query per 500 ids"""
+        name = self._class_name(cls)
+        ids = list(ids)
+        if name not in classes:
+            return []
+        unique = list(dict.fromkeys(ids))
+        found = {}
+        for start in range(0, len(unique), 500):
+            chunk = unique[start:start + 500]
+            rows = self._conn().execute(
+                'SELECT id, data FROM "{}" WHERE id IN ({})'.format(
+                    name, ", ".join("?" * len(chunk))), chunk)
+            for obj_id, data in rows:
+                found[obj_id] = self._build(name, obj_id, data)
+        return [found[obj_id] for obj_id in ids if obj_id in found]
+
+    def related(self, cls, attr, value):
+        """Returns the list of objects of cls whose attribute attr is value,
+        through the index of attr when it is a foreign key"""
+        name = self._class_name(cls)
+        if attr in foreign_keys.get(name, ()):
+            column = attr
+        else:
+            column = "json_extract(data, '$.{}')".format(attr)
+        rows = self._conn().execute(
+            'SELECT id, data FROM "{}" WHERE {} = ?'.format(name, column),
+            (value,))
+        return [self._build(name, obj_id, data) for obj_id, data in rows]
+
+    def count(self, cls=None):
+        """Returns the number of objects in storage matching the given class
+        If no class is passed, returns the number of all objects in storage"""
+        if cls is None:
+            return sum(self.count_by_class().values())
+        name = self._class_name(cls)
+        if name not in classes:
+            return 0
+        return self._conn().execute(
+            'SELECT COUNT(*) FROM "{}"'.format(name)).fetchone()[0]
+
+    def count_by_class(self):
+        """Returns the number of objects of each class, by class name, with
+        one query"""
+        rows = self._conn().execute(" UNION ALL ".join(
+            'SELECT ?, COUNT(*) FROM "{}"'.format(name) for name in classes),
+            list(classes))
+        return dict(rows.fetchall())
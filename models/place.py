@@ -59,20 +59,17 @@ class Place(BaseModel, Base):
         def reviews(self):
             """getter attribute returns the list of Review instances"""
             from models.review import Review
-            review_list = []
-            all_reviews = models.storage.all(Review)
-            for review in all_reviews.values():
-                if review.place_id == self.id:
-                    review_list.append(review)
-            return review_list
+            return models.storage.related(Review, "place_id", self.id)
 
         @property
         def amenities(self):
             """getter attribute returns the list of Amenity instances"""
             from models.amenity import Amenity
-            amenity_list = []
-            all_amenities = models.storage.all(Amenity)
-            for amenity in all_amenities.values():
-                if amenity.place_id == self.id:
-                    amenity_list.append(amenity)
-            return amenity_list
+            return models.storage.get_many(Amenity, self.amenity_ids)
+
+        @amenities.setter
+        def amenities(self, amenity):
+            """setter attribute links an Amenity instance to the place"""
+            from models.amenity import Amenity
+            if type(amenity) is Amenity and amenity.id not in self.amenity_ids:
+                self.amenity_ids = self.amenity_ids + [amenity.id]
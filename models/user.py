@@ -2,11 +2,74 @@
 """ holds class User"""
 import models
 from models.base_model import BaseModel, Base
-from os import getenv
+from os import getenv, urandom
+import base64
+import hashlib
+import hmac
+import re
 import sqlalchemy
 from sqlalchemy import Column, String
-from sqlalchemy.orm import relationship
-from hashlib import md5
+from sqlalchemy.orm import relationship, validates
+
+scheme = getenv("HBNB_PASSWORD_HASH", "md5")
+iterations = int(getenv("HBNB_PASSWORD_ITERATIONS", "600000"))
+legacy = re.compile("[0-9a-f]{32}")
+
+
+def b64(data):
+    """returns data in unpadded base64"""
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+
+def unb64(text):
+    """returns the bytes of an unpadded base64 string"""
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def derive(password, name, params=None, salt=None):
+    """returns the hash of password with the scheme name, its params and
+    salt, new ones when not given"""
+    password = password.encode("utf-8")
+    if name == "md5":
+        return hashlib.md5(password).hexdigest()
+    salt = salt or urandom(16)
+    if name == "pbkdf2_sha256":
+        params = params or [str(iterations)]
+        digest = hashlib.pbkdf2_hmac("sha256", password, salt,
+                                     int(params[0]))
+    elif name == "scrypt":
+        params = params or ["16384", "8", "1"]
+        n, r, p = (int(param) for param in params)
+        digest = hashlib.scrypt(password, salt=salt, n=n, r=r, p=p,
+                                maxmem=256 * n * r + 2 ** 20)
+    else:
+        raise ValueError("unknown password hash {}".format(name))
+    return "$".join([name] + list(params) + [b64(salt), b64(digest)])
+
+
+def hash_password(password):
+    """returns the hash of password, taken as text, with HBNB_PASSWORD_HASH,
+    or password itself when it is None or empty"""
+    if password is None or password == "":
+        return password
+    return derive(str(password), scheme)
+
+
+def check_password(password, hashed):
+    """tells if password, taken as text, matches the hash hashed, False when
+    hashed is not a hash"""
+    if not hashed or password is None or password == "":
+        return False
+    password = str(password)
+    try:
+        if legacy.fullmatch(hashed):
+            expected = derive(password, "md5")
+        else:
+            name, *params, salt, digest = hashed.split("$")
+            expected = derive(password, name, params, unb64(salt))
+    except (ValueError, TypeError, MemoryError):
+        return False
+    return hmac.compare_digest(expected, hashed)
 
 
 class User(BaseModel, Base):
@@ -28,6 +91,42 @@ class User(BaseModel, Base):
     def __init__(self, *args, **kwargs):
         """initializes user"""
         super().__init__(*args, **kwargs)
-        if self.password:
-            hash_pwd = md5(self.password.encode('utf-8'))
-            self.password = hash_pwd.hexdigest()
+
+    @classmethod
+    def from_dict(cls, record):
+        """returns the user stored as record, whose password is kept as it
+        is since it was hashed before being stored"""
+        obj = super().from_dict({key: value for key, value in record.items()
+                                 if key != "password"})
+        if "password" in record:
+            BaseModel.__setattr__(obj, "password", record["password"])
+            obj.mark_saved()
+        return obj
+
+    def check_password(self, password):
+        """tells if password is the password of the user"""
+        return check_password(password, self.password)
+
+    if models.storage_t == 'db':
+        @validates("password")
+        def validate_password(self, key, value):
+            """hashes the passwords set on the user"""
+            return hash_password(value)
+    else:
+        def __setattr__(self, name, value):
+            """hashes the passwords set on the user"""
+            if name == "password":
+                value = hash_password(value)
+            super().__setattr__(name, value)
+
+        @property
+        def places(self):
+            """getter attribute returns the list of Place instances"""
+            from models.place import Place
+            return models.storage.related(Place, "user_id", self.id)
+
+        @property
+        def reviews(self):
+            """getter attribute returns the list of Review instances"""
+            from models.review import Review
+            return models.storage.related(Review, "user_id", self.id)
@@ -1,12 +1,16 @@
 #!/usr/bin/python3
 """
-Contains the class TestConsoleDocs
+Contains the classes TestConsoleDocs and TestConsole
 """
 
 import console
 import inspect
+from io import StringIO
+import models
+from models.state import State
 import pep8
 import unittest
+from unittest import mock
 HBNBCommand = console.HBNBCommand
 
 
@@ -39,3 +43,21 @@ class TestConsoleDocs(unittest.TestCase):
                          "HBNBCommand class needs a docstring")
         self.assertTrue(len(HBNBCommand.__doc__) >= 1,
                         "HBNBCommand class needs a docstring")
+
+
+@unittest.skipIf(models.storage_t == 'db', "not testing db storage")
+class TestConsole(unittest.TestCase):
+    """Class for testing the commands of the console"""
+    def test_update(self):
+        """Test that update changes the stored object"""
+        state = State(name="Volta")
+        state.save()
+        with mock.patch("sys.stdout", new=StringIO()) as out:
+            HBNBCommand().onecmd('update State {} name "Oti"'.format(
+                state.id))
+            HBNBCommand().onecmd("show State {}".format(state.id))
+        self.assertIn("'name': 'Oti'", out.getvalue())
+        models.storage.close()
+        self.assertEqual(models.storage.get(State, state.id).name, "Oti")
+        models.storage.delete(models.storage.get(State, state.id))
+        models.storage.save()
@@ -3,7 +3,10 @@
 from datetime import datetime
 import inspect
 import models
+import os
 import pep8 as pycodestyle
+import subprocess
+import sys
 import time
 import unittest
 from unittest import mock
@@ -138,12 +141,94 @@ class TestBaseModel(unittest.TestCase):
         self.assertEqual(new_d["created_at"], bm.created_at.strftime(t_format))
         self.assertEqual(new_d["updated_at"], bm.updated_at.strftime(t_format))
 
+    def test_format_parse_time(self):
+        """Test that format_time writes datetimes as strftime does and that
+        parse_time reads them back"""
+        t_format = "%Y-%m-%dT%H:%M:%S.%f"
+        for date in [datetime(2017, 9, 28, 21, 3, 54, 52298),
+                     datetime(2017, 9, 28, 21, 3, 54)]:
+            string = models.base_model.format_time(date)
+            self.assertEqual(string, date.strftime(t_format))
+            self.assertEqual(models.base_model.parse_time(string), date)
+        bm = BaseModel(created_at="2017-09-28T21:03:54.052298")
+        self.assertEqual(bm.created_at,
+                         datetime(2017, 9, 28, 21, 3, 54, 52298))
+        self.assertIs(type(bm.updated_at), datetime)
+
+    def test_intern_ids(self):
+        """Test that the ids given to the constructor are interned"""
+        first = BaseModel(id="-".join(["abc", "123"]),
+                          state_id="-".join(["def", "456"]),
+                          amenity_ids=["-".join(["ghi", "789"])])
+        second = BaseModel(id="-".join(["abc", "123"]),
+                           state_id="-".join(["def", "456"]),
+                           amenity_ids=["-".join(["ghi", "789"])])
+        self.assertIs(first.id, second.id)
+        self.assertIs(first.state_id, second.state_id)
+        self.assertIs(first.amenity_ids[0], second.amenity_ids[0])
+
     def test_str(self):
         """test that the str method has the correct output"""
         inst = BaseModel()
         string = "[BaseModel] ({}) {}".format(inst.id, inst.__dict__)
         self.assertEqual(string, str(inst))
 
+    @unittest.skipIf(models.storage_t == 'db', "changes tracked by SQLAlchemy")
+    def test_changed_fields(self):
+        """Test that changed_fields returns the attributes set since the
+        object was last saved"""
+        inst = BaseModel()
+        self.assertEqual(inst.changed_fields(), set(inst.__dict__))
+        inst.mark_saved()
+        self.assertEqual(inst.changed_fields(), set())
+        inst.name = "Holberton"
+        inst.number = 89
+        self.assertEqual(inst.changed_fields(), {"name", "number"})
+        del inst.number
+        self.assertEqual(inst.changed_fields(), {"name", "number"})
+        inst.mark_saved(False)
+        self.assertEqual(inst.changed_fields(), set(inst.__dict__))
+
+    @unittest.skipIf(models.storage_t == 'db', "changes tracked by SQLAlchemy")
+    @mock.patch('models.storage')
+    def test_save_unchanged(self, mock_storage):
+        """Test that save writes a saved and unchanged object whole, with a
+        new updated_at"""
+        inst = BaseModel()
+        inst.mark_saved()
+        updated_at = inst.updated_at
+        inst.save()
+        self.assertNotEqual(inst.updated_at, updated_at)
+        self.assertEqual(inst.changed_fields(), set(inst.to_dict()) -
+                         {"__class__"})
+        mock_storage.new.assert_called_once_with(inst)
+        self.assertTrue(mock_storage.save.called)
+
+    @unittest.skipIf(models.storage_t == 'db', "no compact mode in db mode")
+    def test_compact(self):
+        """Test that compact mode keeps the attributes in slots without
+        changing to_dict, __str__ or attribute access"""
+        code = "\n".join([
+            "from models.place import Place",
+            "place = Place(name='Villa', number_rooms=3)",
+            "assert 'name' in Place.__slots__",
+            "assert place.name == 'Villa' and place.max_guest == 0",
+            "place.color = 'blue'",
+            "assert place.color == 'blue'",
+            "d = place.to_dict()",
+            "assert d['name'] == 'Villa' and d['color'] == 'blue'",
+            "assert 'max_guest' not in d and '_extra' not in d",
+            "assert str(place).endswith(str(place.__dict__))",
+            "del place.color",
+            "assert not hasattr(place, 'color')",
+            "assert Place(**d).color == 'blue'",
+            "print('ok')"])
+        env = dict(os.environ, HBNB_COMPACT_MODELS="1")
+        env.pop("HBNB_TYPE_STORAGE", None)
+        out = subprocess.check_output([sys.executable, "-c", code], env=env,
+                                      universal_newlines=True)
+        self.assertEqual(out.strip(), "ok")
+
     @mock.patch('models.storage')
     def test_save(self, mock_storage):
         """Test that save method updates `updated_at` and calls
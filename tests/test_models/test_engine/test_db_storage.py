@@ -17,7 +17,9 @@ from models.user import User
 import json
 import os
 import pep8
+import sqlite3
 import unittest
+from unittest import mock
 DBStorage = db_storage.DBStorage
 classes = {"Amenity": Amenity, "City": City, "Place": Place,
            "Review": Review, "State": State, "User": User}
@@ -99,6 +101,27 @@ class TestFileStorage(unittest.TestCase):
         self.assertEqual(state_id, retrieved_id)
         self.assertEqual(None, storage.get(State, '12345'))
 
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_get_many(self):
+        """Test that get_many retrieves the objects of the ids in order"""
+        from models import storage
+        states = [State(name="Volta"), State(name="Oti")]
+        for state in states:
+            state.save()
+        ids = [states[1].id, "12345", states[0].id]
+        self.assertEqual(storage.get_many(State, ids), states[::-1])
+        self.assertEqual(storage.get_many(State, []), [])
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_count_by_class(self):
+        """Test that count_by_class returns the count of every class"""
+        from models import storage
+        counts = storage.count_by_class()
+        self.assertEqual(set(counts), set(classes))
+        for name, count in counts.items():
+            self.assertEqual(count, storage.count(classes[name]))
+        self.assertEqual(sum(counts.values()), storage.count())
+
     @unittest.skipIf(models.storage_t == 'db', "not testing db storage")
     def test_count(self):
         """Test if count returns the correct number of objects"""
@@ -107,3 +130,51 @@ class TestFileStorage(unittest.TestCase):
         state_objs = storage.all(State)
         self.assertEqual(storage.count(), len(all_objs))
         self.assertEqual(storage.count(State), len(state_objs))
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_load_relationships(self):
+        """Test that the relationships named in load are loaded with a
+        constant number of queries"""
+        from models import storage
+        states = [State(name=str(i)) for i in range(5)]
+        for state in states:
+            storage.new(state)
+            for i in range(3):
+                storage.new(City(name=str(i), state_id=state.id))
+        storage.save()
+        storage.close()
+        count = storage.query_count()
+        loaded = storage.all(State, load=["cities"]).values()
+        self.assertGreaterEqual(sum(len(s.cities) for s in loaded), 15)
+        self.assertEqual(storage.query_count() - count, 2)
+        storage.close()
+        count = storage.query_count()
+        state = storage.get(State, states[0].id, load=["cities"])
+        self.assertEqual(len(state.cities), 3)
+        self.assertEqual(storage.query_count() - count, 1)
+        with self.assertRaises(ValueError):
+            storage.all(State, load=["cities"], strategy="lazy")
+
+    def test_pool_options(self):
+        """Test that the pool settings are read from the environment"""
+        with mock.patch.dict(os.environ, {"HBNB_MYSQL_POOL_SIZE": "3",
+                                          "HBNB_MYSQL_POOL_PRE_PING": "0"}):
+            options = db_storage.pool_options()
+        self.assertEqual(options["pool_size"], 3)
+        self.assertFalse(options["pool_pre_ping"])
+        self.assertEqual(options["max_overflow"], 10)
+
+    def test_metered_pool(self):
+        """Test that MeteredPool counts its checkouts and timeouts"""
+        pool = db_storage.MeteredPool(lambda: sqlite3.connect(":memory:"),
+                                      pool_size=1, max_overflow=0,
+                                      timeout=0.01)
+        conn = pool.connect()
+        self.assertEqual((pool.checkouts, pool.checkedout()), (1, 1))
+        with self.assertRaises(db_storage.sqlalchemy.exc.TimeoutError):
+            pool.connect()
+        self.assertEqual(pool.timeouts, 1)
+        conn.close()
+        pool.connect().close()
+        self.assertEqual((pool.checkouts, pool.checkedout()), (2, 0))
+        self.assertGreaterEqual(pool.wait_time, pool.max_wait)
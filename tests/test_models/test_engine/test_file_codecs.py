@@ -0,0 +1,141 @@
+#!/usr/bin/python3
+"""
+Contains the TestFileCodecsDocs and TestFileCodecs classes
+"""
+
+from datetime import datetime
+import inspect
+import io
+import models
+from models.engine import file_codecs
+from models.state import State
+import json
+import os
+import pep8
+import unittest
+codecs = [name for name in file_codecs.codecs
+          if name != "msgpack" or file_codecs.msgpack is not None]
+
+
+class TestFileCodecsDocs(unittest.TestCase):
+    """Tests to check the documentation and style of file_codecs"""
+    @classmethod
+    def setUpClass(cls):
+        """Set up for the doc tests"""
+        cls.fc_f = inspect.getmembers(file_codecs, inspect.isfunction)
+        for name, codec in file_codecs.codecs.items():
+            cls.fc_f += inspect.getmembers(type(codec), inspect.isfunction)
+
+    def test_pep8_conformance_file_codecs(self):
+        """Test that models/engine/file_codecs.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/file_codecs.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_conformance_test_file_codecs(self):
+        """Test tests/test_models/test_file_codecs.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['tests/test_models/test_engine/\
+test_file_codecs.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_file_codecs_module_docstring(self):
+        """Test for the file_codecs.py module docstring"""
+        self.assertIsNot(file_codecs.__doc__, None,
+                         "file_codecs.py needs a docstring")
+        self.assertTrue(len(file_codecs.__doc__) >= 1,
+                        "file_codecs.py needs a docstring")
+
+    def test_fc_func_docstrings(self):
+        """Test for the presence of docstrings in file_codecs functions"""
+        for func in self.fc_f:
+            self.assertIsNot(func[1].__doc__, None,
+                             "{:s} method needs a docstring".format(func[0]))
+            self.assertTrue(len(func[1].__doc__) >= 1,
+                            "{:s} method needs a docstring".format(func[0]))
+
+
+class TestIterJsonObject(unittest.TestCase):
+    """Test the iter_json_object function"""
+    def test_matches_json_load(self):
+        """Test that the pairs read by chunks are the ones json.load reads"""
+        js = {"State.1": {"name": "Ho \\\"}\u00e9", "n": [1, 2.5e3, None]},
+              "City.2": {"big": 123456789, "ok": True, "nested": {"a": {}}},
+              "Empty": {}}
+        for indent in [None, 4]:
+            for chunk_size in [1, 3, 7, 65536]:
+                with self.subTest(indent=indent, chunk_size=chunk_size):
+                    f = io.StringIO(json.dumps(js, indent=indent))
+                    pairs = list(file_codecs.iter_json_object(f, chunk_size))
+                    self.assertEqual(pairs, list(js.items()))
+
+    def test_empty(self):
+        """Test that empty objects and files yield nothing"""
+        for text in ["", "{}", " { } "]:
+            with self.subTest(text=text):
+                f = io.StringIO(text)
+                self.assertEqual(list(file_codecs.iter_json_object(f)), [])
+
+    def test_truncated(self):
+        """Test that a truncated object raises a ValueError"""
+        f = io.StringIO('{"State.1": {"name": "Ho"}, "State.2": {"na')
+        with self.assertRaises(ValueError):
+            list(file_codecs.iter_json_object(f, 4))
+
+
+class TestFileCodecs(unittest.TestCase):
+    """Test the codecs"""
+    def test_round_trip(self):
+        """Test that every codec reads back the objects it wrote"""
+        state = State(name="Oti")
+        for name in codecs:
+            codec = file_codecs.get_codec(name)
+            with self.subTest(codec=name):
+                f = io.BytesIO() if codec.binary else io.StringIO()
+                key = "State." + state.id
+                codec.dump([(key, codec.record(state))], f)
+                f.seek(0)
+                pairs = list(codec.load(f))
+                self.assertEqual(len(pairs), 1)
+                self.assertEqual(pairs[0][0], key)
+                copy = State(**pairs[0][1])
+                self.assertEqual(copy.to_dict(), state.to_dict())
+
+    def test_json_codec_matches_json_dump(self):
+        """Test that the JSON codec writes what json.dump writes"""
+        state = State(name="Oti")
+        js = {"State." + state.id: state.to_dict()}
+        codec = file_codecs.get_codec("json")
+        f = io.StringIO()
+        codec.dump(js.items(), f)
+        self.assertEqual(f.getvalue(), json.dumps(js))
+
+    def test_unknown_codec(self):
+        """Test that get_codec rejects unknown names"""
+        with self.assertRaises(ValueError):
+            file_codecs.get_codec("yaml")
+
+    def test_convert(self):
+        """Test that convert rewrites a file with another codec"""
+        state = State(name="Oti")
+        js = {"State." + state.id: state.to_dict()}
+        with open("convert_test.json", "w") as f:
+            json.dump(js, f)
+        try:
+            file_codecs.convert("convert_test.json", "json",
+                                "convert_test.pickle", "pickle")
+            file_codecs.convert("convert_test.pickle", "pickle",
+                                "convert_test.out.json", "json")
+            with open("convert_test.pickle", "rb") as f:
+                codec = file_codecs.get_codec("pickle")
+                record = dict(codec.load(f))["State." + state.id]
+            self.assertIs(type(record["created_at"]), datetime)
+            with open("convert_test.out.json", "r") as f:
+                self.assertEqual(json.load(f), js)
+        finally:
+            for path in ["convert_test.json", "convert_test.pickle",
+                         "convert_test.out.json"]:
+                if os.path.exists(path):
+                    os.remove(path)
@@ -6,7 +6,7 @@ Contains the TestFileStorageDocs classes
 from datetime import datetime
 import inspect
 import models
-from models.engine import file_storage
+from models.engine import file_codecs, file_storage
 from models.amenity import Amenity
 from models.base_model import BaseModel
 from models.city import City
@@ -17,7 +17,12 @@ from models.user import User
 import json
 import os
 import pep8
+import subprocess
+import sys
+import tempfile
+import threading
 import unittest
+from unittest import mock
 FileStorage = file_storage.FileStorage
 classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
@@ -70,7 +75,8 @@ test_file_storage.py'])
 
 class TestFileStorage(unittest.TestCase):
     """Test the FileStorage class"""
-    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    @unittest.skipIf(models.storage_t in ['db', 'sqlite'],
+                     "not testing file storage")
     def test_all_returns_dict(self):
         """Test that all returns the FileStorage.__objects attr"""
         storage = FileStorage()
@@ -78,7 +84,55 @@ class TestFileStorage(unittest.TestCase):
         self.assertEqual(type(new_dict), dict)
         self.assertIs(new_dict, storage._FileStorage__objects)
 
-    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    @unittest.skipIf(models.storage_t in ['db', 'sqlite'],
+                     "not testing file storage")
+    def test_all_cls(self):
+        """Test that all(cls) only returns the objects of cls"""
+        storage = FileStorage()
+        state = State(name="Volta")
+        city = City(name="Ho", state_id=state.id)
+        storage.new(state)
+        storage.new(city)
+        for cls in [State, "State"]:
+            with self.subTest(cls=cls):
+                states = storage.all(cls)
+                self.assertIn("State." + state.id, states)
+                self.assertNotIn("City." + city.id, states)
+                for obj in states.values():
+                    self.assertIs(type(obj), State)
+        storage.delete(state)
+        storage.delete(city)
+        self.assertNotIn("State." + state.id, storage.all(State))
+        self.assertIsNone(storage.get(State, state.id))
+
+    @unittest.skipIf(models.storage_t in ['db', 'sqlite'],
+                     "not testing file storage")
+    def test_related(self):
+        """Test that related follows new and delete of the children"""
+        storage = FileStorage()
+        state = State(name="Volta")
+        other = State(name="Oti")
+        city = City(name="Ho", state_id=state.id)
+        for obj in [state, other, city]:
+            storage.new(obj)
+        self.assertEqual(storage.related(City, "state_id", state.id), [city])
+        self.assertEqual(state.cities, [city])
+        city.state_id = other.id
+        self.assertEqual(storage.related(City, "state_id", state.id), [])
+        self.assertEqual(other.cities, [city])
+        storage.new(city)
+        self.assertEqual(other.cities, [city])
+        storage.save()
+        city.state_id = state.id
+        self.assertEqual(other.cities, [])
+        self.assertEqual(state.cities, [city])
+        storage.delete(city)
+        self.assertEqual(other.cities, [])
+        storage.delete(state)
+        storage.delete(other)
+
+    @unittest.skipIf(models.storage_t in ['db', 'sqlite'],
+                     "not testing file storage")
     def test_new(self):
         """test that new adds an object to the FileStorage.__objects attr"""
         storage = FileStorage()
@@ -94,7 +148,8 @@ class TestFileStorage(unittest.TestCase):
                 self.assertEqual(test_dict, storage._FileStorage__objects)
         FileStorage._FileStorage__objects = save
 
-    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    @unittest.skipIf(models.storage_t in ['db', 'sqlite'],
+                     "not testing file storage")
     def test_save(self):
         """Test that save properly saves objects to file.json"""
         storage = FileStorage()
@@ -114,7 +169,609 @@ class TestFileStorage(unittest.TestCase):
             js = f.read()
         self.assertEqual(json.loads(string), json.loads(js))
 
-    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    @unittest.skipIf(models.storage_t in ['db', 'sqlite'],
+                     "not testing file storage")
+    def test_save_unchanged(self):
+        """Test that save does not rewrite file.json when nothing changed"""
+        storage = FileStorage()
+        state = State(name="Eastern")
+        state.save()
+        mtime = os.stat("file.json").st_mtime_ns
+        storage.save()
+        self.assertEqual(mtime, os.stat("file.json").st_mtime_ns)
+        self.assertEqual([], [f for f in os.listdir(".")
+                              if f.endswith(".tmp")])
+
+    @unittest.skipIf(models.storage_t in ['db', 'sqlite'],
+                     "not testing file storage")
+    def test_save_changed_attribute(self):
+        """Test that save writes the attributes set on stored objects"""
+        storage = FileStorage()
+        state = State(name="Eastern")
+        state.save()
+        state.name = "Oti"
+        self.assertIn("State." + state.id, FileStorage._FileStorage__dirty)
+        storage.save()
+        with open("file.json", "r") as f:
+            js = json.load(f)
+        self.assertEqual(js["State." + state.id]["name"], "Oti")
+        self.assertEqual(state.changed_fields(), set())
+
+    @unittest.skipIf(models.storage_t in ['db', 'sqlite'],
+                     "not testing file storage")
+    def test_save_changed_in_place(self):
+        """Test that obj.save() and storage.save() write the changes made
+        inside mutable attributes"""
+        storage = FileStorage()
+        place = Place(name="Villa", amenity_ids=[])
+        place.save()
+        updated_at = place.updated_at
+        place.amenity_ids.append("1234")
+        place.save()
+        self.assertNotEqual(place.updated_at, updated_at)
+        with open("file.json", "r") as f:
+            js = json.load(f)
+        self.assertEqual(js["Place." + place.id]["amenity_ids"], ["1234"])
+        place.amenity_ids.append("5678")
+        storage.save()
+        with open("file.json", "r") as f:
+            js = json.load(f)
+        self.assertEqual(js["Place." + place.id]["amenity_ids"],
+                         ["1234", "5678"])
+        self.assertEqual(place.changed_fields(), set())
+
+    @unittest.skipIf(models.storage_t in ['db', 'sqlite'],
+                     "not testing file storage")
+    def test_reload_unchanged_file(self):
+        """Test that reload keeps the objects when file.json is unchanged"""
+        storage = FileStorage()
+        state = State(name="Ashanti")
+        state.save()
+        storage.reload()
+        self.assertIs(storage.get(State, state.id), state)
+
+    @unittest.skipIf(models.storage_t in ['db', 'sqlite'],
+                     "not testing file storage")
+    def test_reload_merges_changes(self):
+        """Test that reload only rebuilds the objects changed in file.json"""
+        storage = FileStorage()
+        state = State(name="Ashanti")
+        other = State(name="Central")
+        state.save()
+        other.save()
+        with open("file.json", "r") as f:
+            js = json.load(f)
+        js["State." + state.id]["name"] = "Western"
+        js["State." + state.id]["updated_at"] = "2017-01-01T00:00:00.000000"
+        del js["State." + other.id]
+        with open("file.json", "w") as f:
+            json.dump(js, f, indent=4)
+        storage.reload()
+        self.assertEqual(storage.get(State, state.id).name, "Western")
+        self.assertIsNone(storage.get(State, other.id))
+
+    @unittest.skipIf(models.storage_t in ['db', 'sqlite'],
+                     "not testing file storage")
+    def test_save_journal(self):
+        """Test that journal mode appends the changes and reload replays
+        them over file.json"""
+        storage = FileStorage()
+        storage.save()
+        FileStorage._FileStorage__journal = True
+        try:
+            state = State(name="Northern")
+            state.save()
+            state.name = "Savannah"
+            storage.save()
+            with open("file.json.journal", "r") as f:
+                lines = [json.loads(line) for line in f]
+            self.assertEqual(len(lines), 2)
+            self.assertEqual(lines[0]["value"]["name"], "Northern")
+            self.assertEqual(lines[-1]["key"], "State." + state.id)
+            self.assertEqual(lines[-1]["fields"],
+                             {"name": "Savannah",
+                              "updated_at": state.to_dict()["updated_at"]})
+            storage.save()
+            state.save()
+            with open("file.json.journal", "r") as f:
+                lines = [json.loads(line) for line in f]
+            self.assertEqual(len(lines), 3)
+            self.assertEqual(lines[-1]["value"], state.to_dict())
+            FileStorage._FileStorage__file_stat = None
+            FileStorage._FileStorage__synced = {}
+            storage.reload()
+            self.assertEqual(storage.get(State, state.id).name, "Savannah")
+            self.assertIsNot(storage.get(State, state.id), state)
+            storage.delete(storage.get(State, state.id))
+            storage.save()
+            with open("file.json.journal", "r") as f:
+                lines = [json.loads(line) for line in f]
+            self.assertIsNone(lines[-1]["value"])
+        finally:
+            FileStorage._FileStorage__journal = False
+            storage._write_snapshot()
+        self.assertFalse(os.path.exists("file.json.journal"))
+
+    @unittest.skipIf(models.storage_t in ['db', 'sqlite'],
+                     "not testing file storage")
+    def test_save_journal_torn(self):
+        """Test that the saves appended after a line cut short by a crash
+        are replayed by reload"""
+        storage = FileStorage()
+        storage.save()
+        FileStorage._FileStorage__journal = True
+        try:
+            first = State(name="Ahafo")
+            first.save()
+            with open("file.json.journal", "a") as f:
+                f.write('{"key": "State.torn", "val')
+            second = State(name="Bono East")
+            second.save()
+            third = State(name="Oti")
+            third.save()
+            attrs = ["objects", "by_class", "synced", "file_stat", "pending"]
+            save = {attr: getattr(FileStorage, "_FileStorage__" + attr)
+                    for attr in attrs}
+            try:
+                FileStorage._FileStorage__objects = {}
+                FileStorage._FileStorage__by_class = {}
+                FileStorage._FileStorage__synced = {}
+                FileStorage._FileStorage__file_stat = None
+                FileStorage._FileStorage__pending = {}
+                storage.reload()
+                for state in (first, second, third):
+                    self.assertEqual(storage.get(State, state.id).name,
+                                     state.name)
+            finally:
+                for attr, value in save.items():
+                    setattr(FileStorage, "_FileStorage__" + attr, value)
+        finally:
+            FileStorage._FileStorage__journal = False
+            storage._write_snapshot()
+
+    @unittest.skipIf(models.storage_t in ['db', 'sqlite'],
+                     "not testing file storage")
+    def test_reload_unreadable(self):
+        """Test that reload keeps the objects and the indexes as they are
+        when the merge fails, and that save does not overwrite the file"""
+        storage = FileStorage()
+        state = State(name="Ashanti")
+        city = City(name="Kumasi", state_id=state.id)
+        state.save()
+        city.save()
+        with open("file.json", "r") as f:
+            js = json.load(f)
+        js["State." + state.id]["name"] = "Western"
+        js["State." + state.id]["updated_at"] = "2000-01-01T00:00:00.000000"
+        js["City." + city.id]["state_id"] = "1234"
+        js["City." + city.id]["updated_at"] = "2000-01-01T00:00:00.000000"
+        with open("file.json", "w") as f:
+            json.dump(js, f)
+        build = FileStorage._build
+        with mock.patch.object(FileStorage, "_build",
+                               side_effect=[build("State", js["State." +
+                                                              state.id]),
+                                            ValueError("bad record")]), \
+                self.assertLogs("models.engine.file_storage", "WARNING"):
+            storage.reload()
+        self.assertIs(storage.get(State, state.id), state)
+        self.assertEqual(state.name, "Ashanti")
+        self.assertEqual(storage.related(City, "state_id", state.id), [city])
+        with open("file.json", "w") as f:
+            f.write("{")
+        FileStorage._FileStorage__generation = -1
+        storage.new(State(name="Volta"))
+        with self.assertRaises(ValueError):
+            storage.save()
+        with open("file.json", "r") as f:
+            self.assertEqual(f.read(), "{")
+        FileStorage._FileStorage__dirty.clear()
+        FileStorage._FileStorage__file_stat = None
+        os.remove("file.json")
+
+    @unittest.skipIf(models.storage_t in ['db', 'sqlite'],
+                     "not testing file storage")
+    def test_reload_lazy(self):
+        """Test that lazy mode only builds the objects that are looked up"""
+        storage = FileStorage()
+        state = State(name="Bono")
+        state.save()
+        with open("file.json", "r") as f:
+            js = json.load(f)
+        states = [key for key in js if key.startswith("State.")]
+        attrs = ["objects", "by_class", "synced", "file_stat", "pending"]
+        save = {attr: getattr(FileStorage, "_FileStorage__" + attr)
+                for attr in attrs}
+        FileStorage._FileStorage__lazy = True
+        try:
+            FileStorage._FileStorage__objects = {}
+            FileStorage._FileStorage__by_class = {}
+            FileStorage._FileStorage__synced = {}
+            FileStorage._FileStorage__file_stat = None
+            FileStorage._FileStorage__pending = {}
+            storage.reload()
+            key = "State." + state.id
+            self.assertNotIn(key, storage._FileStorage__objects)
+            self.assertEqual(storage.count(), len(js))
+            self.assertEqual(storage.count(State), len(states))
+            self.assertEqual(storage.get(State, state.id).name, "Bono")
+            self.assertIn(key, storage._FileStorage__objects)
+            self.assertEqual(len(storage.all()), len(js))
+            self.assertEqual(storage._FileStorage__pending, {})
+        finally:
+            FileStorage._FileStorage__lazy = False
+            for attr, value in save.items():
+                setattr(FileStorage, "_FileStorage__" + attr, value)
+
+    @unittest.skipIf(models.storage_t in ['db', 'sqlite'],
+                     "not testing file storage")
+    def test_save_sharded(self):
+        """Test that sharded mode only rewrites the shards of the changed
+        objects and can reload a subset of the classes"""
+        storage = FileStorage()
+        attrs = ["objects", "by_class", "synced", "file_stat", "dirty"]
+        save = {attr: getattr(FileStorage, "_FileStorage__" + attr)
+                for attr in attrs}
+        FileStorage._FileStorage__shards = 2
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__by_class = {}
+        FileStorage._FileStorage__synced = {}
+        FileStorage._FileStorage__dirty = set()
+        try:
+            state = State(name="Upper East")
+            city = City(name="Bolgatanga", state_id=state.id)
+            state.save()
+            city.save()
+            shards = sorted(os.listdir("file.json.d"))
+            self.assertEqual(len(shards), 2)
+            self.assertTrue(shards[0].startswith("City."))
+            self.assertTrue(shards[1].startswith("State."))
+            city_shard = os.path.join("file.json.d", shards[0])
+            mtime = os.stat(city_shard).st_mtime_ns
+            state.name = "Upper West"
+            state.save()
+            self.assertEqual(mtime, os.stat(city_shard).st_mtime_ns)
+            FileStorage._FileStorage__load_classes = ["State"]
+            FileStorage._FileStorage__objects = {}
+            FileStorage._FileStorage__by_class = {}
+            FileStorage._FileStorage__synced = {}
+            FileStorage._FileStorage__file_stat = None
+            storage.reload()
+            self.assertEqual(storage.get(State, state.id).name, "Upper West")
+            self.assertEqual(storage.count(), 1)
+            storage.delete(storage.get(State, state.id))
+            storage.save()
+            with open(city_shard, "r") as f:
+                self.assertIn("City." + city.id, json.load(f))
+        finally:
+            FileStorage._FileStorage__shards = 0
+            FileStorage._FileStorage__load_classes = None
+            for attr, value in save.items():
+                setattr(FileStorage, "_FileStorage__" + attr, value)
+            for shard in os.listdir("file.json.d"):
+                os.remove(os.path.join("file.json.d", shard))
+            os.rmdir("file.json.d")
+
+    @unittest.skipIf(models.storage_t in ['db', 'sqlite'],
+                     "not testing file storage")
+    def test_save_sharded_subset(self):
+        """Test that the saves of a process reading a subset of the classes
+        keep the objects of the other classes it did not read"""
+        storage = FileStorage()
+        attrs = ["objects", "by_class", "synced", "file_stat", "dirty",
+                 "pending"]
+        save = {attr: getattr(FileStorage, "_FileStorage__" + attr)
+                for attr in attrs}
+        FileStorage._FileStorage__shards = 1
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__by_class = {}
+        FileStorage._FileStorage__synced = {}
+        FileStorage._FileStorage__dirty = set()
+        FileStorage._FileStorage__pending = {}
+        try:
+            state = State(name="Central")
+            state.save()
+            cities = [City(name=name, state_id=state.id)
+                      for name in ("Cape Coast", "Winneba", "Elmina")]
+            for city in cities:
+                storage.new(city)
+            storage.save()
+            FileStorage._FileStorage__load_classes = ["State"]
+            FileStorage._FileStorage__objects = {}
+            FileStorage._FileStorage__by_class = {}
+            FileStorage._FileStorage__synced = {}
+            FileStorage._FileStorage__file_stat = None
+            FileStorage._FileStorage__pending = {}
+            storage.reload()
+            state = storage.get(State, state.id)
+            cities.append(City(name="Saltpond", state_id=state.id))
+            cities[-1].save()
+            state.name = "Central Region"
+            state.save()
+            storage._write_snapshot()
+            with open(os.path.join("file.json.d", "City.json"), "r") as f:
+                self.assertEqual(sorted(json.load(f)),
+                                 sorted("City." + city.id for city in cities))
+        finally:
+            FileStorage._FileStorage__shards = 0
+            FileStorage._FileStorage__load_classes = None
+            for attr, value in save.items():
+                setattr(FileStorage, "_FileStorage__" + attr, value)
+            for shard in os.listdir("file.json.d"):
+                os.remove(os.path.join("file.json.d", shard))
+            os.rmdir("file.json.d")
+
+    @unittest.skipIf(models.storage_t in ['db', 'sqlite'],
+                     "not testing file storage")
+    @unittest.skipIf(models.base_model.compact, "no cache in compact mode")
+    def test_save_fragments(self):
+        """Test that save only encodes the objects changed since the last
+        write"""
+        storage = FileStorage()
+        state = State(name="Ashanti")
+        other = State(name="Bono")
+        storage.new(state)
+        storage.new(other)
+        storage._write_snapshot()
+        encoded = []
+        to_dict = BaseModel.to_dict
+
+        def count_to_dict(obj):
+            encoded.append(obj.id)
+            return to_dict(obj)
+        state.name = "Oti"
+        city = City(name="Dambai", state_id=state.id)
+        storage.new(city)
+        with mock.patch.object(BaseModel, "to_dict", count_to_dict):
+            storage.save()
+        self.assertEqual(sorted(encoded), sorted([state.id, city.id]))
+        with open("file.json", "r") as f:
+            js = json.load(f)
+        self.assertEqual(js, {key: obj.to_dict()
+                              for key, obj in storage.all().items()})
+        self.assertEqual(js["State." + state.id]["name"], "Oti")
+
+    @unittest.skipIf(models.storage_t in ['db', 'sqlite'],
+                     "not testing file storage")
+    def test_save_codec(self):
+        """Test that save and reload go through the configured codec"""
+        storage = FileStorage()
+        attrs = ["codec", "file_path", "objects", "by_class", "synced",
+                 "file_stat", "dirty"]
+        save = {attr: getattr(FileStorage, "_FileStorage__" + attr)
+                for attr in attrs}
+        FileStorage._FileStorage__codec = file_codecs.get_codec("pickle")
+        FileStorage._FileStorage__file_path = "file.pickle"
+        try:
+            state = State(name="Western North")
+            state.save()
+            FileStorage._FileStorage__objects = {}
+            FileStorage._FileStorage__by_class = {}
+            FileStorage._FileStorage__synced = {}
+            FileStorage._FileStorage__file_stat = None
+            storage.reload()
+            copy = storage.get(State, state.id)
+            self.assertIsNot(copy, state)
+            self.assertEqual(copy.to_dict(), state.to_dict())
+        finally:
+            for attr, value in save.items():
+                setattr(FileStorage, "_FileStorage__" + attr, value)
+            os.remove("file.pickle")
+
+    @unittest.skipIf(models.storage_t in ['db', 'sqlite'],
+                     "not testing file storage")
+    def test_reload_codec_unchanged(self):
+        """Test that reload keeps the objects another process did not change
+        with a codec that stores the datetimes as numbers"""
+        storage = FileStorage()
+        attrs = ["codec", "file_path", "lock_path", "journal_path", "objects",
+                 "by_class", "synced", "file_stat", "dirty", "generation",
+                 "pending"]
+        save = {attr: getattr(FileStorage, "_FileStorage__" + attr)
+                for attr in attrs}
+        FileStorage._FileStorage__codec = file_codecs.get_codec("marshal")
+        FileStorage._FileStorage__file_path = "file.marshal"
+        FileStorage._FileStorage__lock_path = "file.marshal.lock"
+        FileStorage._FileStorage__journal_path = "file.marshal.journal"
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__by_class = {}
+        FileStorage._FileStorage__synced = {}
+        FileStorage._FileStorage__file_stat = None
+        FileStorage._FileStorage__dirty = set()
+        FileStorage._FileStorage__pending = {}
+        try:
+            state = State(name="Ahafo")
+            state.save()
+            code = "from models.state import State; State(name='Oti').save()"
+            subprocess.check_call([sys.executable, "-c", code],
+                                  env=dict(os.environ,
+                                           HBNB_FILE_CODEC="marshal"))
+            storage.reload()
+            self.assertEqual(storage.count(State), 2)
+            self.assertIs(storage.get(State, state.id), state)
+        finally:
+            for attr, value in save.items():
+                setattr(FileStorage, "_FileStorage__" + attr, value)
+            for path in ("file.marshal", "file.marshal.lock",
+                         "file.marshal.journal"):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    @unittest.skipIf(models.storage_t in ['db', 'sqlite'],
+                     "not testing file storage")
+    def test_journal_codec(self):
+        """Test that the journal is named after the file of the codec"""
+        root = os.path.dirname(os.path.abspath(models.__path__[0]))
+        env = dict(os.environ, PYTHONPATH=root, HBNB_FILE_CODEC="marshal",
+                   HBNB_FILE_JOURNAL="1")
+        code = "from models.state import State; State().save()"
+        with tempfile.TemporaryDirectory() as tmp:
+            subprocess.check_call([sys.executable, "-c", code], cwd=tmp,
+                                  env=env)
+            self.assertIn("file.marshal.journal", os.listdir(tmp))
+            self.assertNotIn("file.json.journal", os.listdir(tmp))
+
+    @unittest.skipIf(models.storage_t in ['db', 'sqlite'],
+                     "not testing file storage")
+    @unittest.skipIf(file_storage.fcntl is None, "no advisory locks")
+    def test_save_other_process(self):
+        """Test that save keeps the objects saved by another process"""
+        storage = FileStorage()
+        state = State(name="Ahafo")
+        state.save()
+        code = ("from models.state import State; "
+                "state = State(name='Bono East'); state.save(); "
+                "print(state.id)")
+        other_id = subprocess.check_output(
+            [sys.executable, "-c", code], env=dict(os.environ),
+            universal_newlines=True).strip()
+        self.assertIsNone(storage.get(State, other_id))
+        state.name = "Ahafo North"
+        state.save()
+        self.assertEqual(storage.get(State, other_id).name, "Bono East")
+        with open("file.json", "r") as f:
+            js = json.load(f)
+        self.assertIn("State." + other_id, js)
+        self.assertEqual(js["State." + state.id]["name"], "Ahafo North")
+
+    @unittest.skipIf(models.storage_t in ['db', 'sqlite'],
+                     "not testing file storage")
+    @unittest.skipIf(file_storage.fcntl is None, "no advisory locks")
+    def test_save_other_process_changed(self):
+        """Test that an attribute set and saved with storage.save() by
+        another process is read back and not written over"""
+        storage = FileStorage()
+        state = State(name="Ahafo")
+        state.save()
+        code = ("import models, sys; "
+                "state = models.storage.get('State', sys.argv[1]); "
+                "state.name = 'Bono East'; models.storage.save(); "
+                "print(models.storage.get('State', sys.argv[1]).name)")
+        command = [sys.executable, "-c", code, state.id]
+        name = subprocess.check_output(command, env=dict(os.environ),
+                                       universal_newlines=True).strip()
+        self.assertEqual(name, "Bono East")
+        storage.reload()
+        self.assertEqual(storage.get(State, state.id).name, "Bono East")
+        State(name="Oti").save()
+        code = ("import models, sys; "
+                "print(models.storage.get('State', sys.argv[1]).name)")
+        command = [sys.executable, "-c", code, state.id]
+        name = subprocess.check_output(command, env=dict(os.environ),
+                                       universal_newlines=True).strip()
+        self.assertEqual(name, "Bono East")
+
+    @unittest.skipIf(models.storage_t in ['db', 'sqlite'],
+                     "not testing file storage")
+    def test_import_creates_no_file(self):
+        """Test that importing models with no file to read creates none"""
+        root = os.path.dirname(os.path.abspath(models.__path__[0]))
+        env = dict(os.environ, PYTHONPATH=root)
+        with tempfile.TemporaryDirectory() as tmp:
+            subprocess.check_call([sys.executable, "-c", "import models"],
+                                  cwd=tmp, env=env)
+            self.assertEqual(os.listdir(tmp), [])
+
+    @unittest.skipIf(models.storage_t in ['db', 'sqlite'],
+                     "not testing file storage")
+    def test_save_write_behind(self):
+        """Test that write-behind mode writes the saves of a window once"""
+        storage = FileStorage()
+        storage.save()
+        FileStorage._FileStorage__flush_ms = 50
+        try:
+            state = State(name="Savannah")
+            other = State(name="Oti")
+            storage.new(state)
+            future = storage.save()
+            storage.new(other)
+            self.assertIs(storage.save(), future)
+            with open("file.json", "r") as f:
+                self.assertNotIn("State." + state.id, json.load(f))
+            future.result(5)
+            with open("file.json", "r") as f:
+                js = json.load(f)
+            self.assertIn("State." + state.id, js)
+            self.assertIn("State." + other.id, js)
+            storage.delete(other)
+            storage.save()
+            storage.flush()
+            with open("file.json", "r") as f:
+                self.assertNotIn("State." + other.id, json.load(f))
+        finally:
+            FileStorage._FileStorage__flush_ms = 0
+
+    @unittest.skipIf(models.storage_t in ['db', 'sqlite'],
+                     "not testing file storage")
+    def test_all_snapshot(self):
+        """Test that the dictionary returned by all() does not change while
+        other threads add and delete objects"""
+        storage = FileStorage()
+        snapshot = storage.all()
+        keys = set(snapshot)
+        state = State(name="Bono")
+        storage.new(state)
+        self.assertEqual(set(snapshot), keys)
+        self.assertIn("State." + state.id, storage.all())
+        snapshot = storage.all()
+        storage.delete(state)
+        self.assertIn("State." + state.id, snapshot)
+        self.assertNotIn("State." + state.id, storage.all())
+        errors = []
+        done = threading.Event()
+
+        def read():
+            try:
+                while not done.is_set():
+                    for key, obj in storage.all().items():
+                        obj.id
+            except Exception as e:
+                errors.append(e)
+        readers = [threading.Thread(target=read) for i in range(4)]
+        for reader in readers:
+            reader.start()
+        try:
+            for i in range(2000):
+                state = State(name="Ahafo")
+                storage.new(state)
+                storage.delete(state)
+        finally:
+            done.set()
+            for reader in readers:
+                reader.join()
+        self.assertEqual(errors, [])
+
+    @unittest.skipIf(models.storage_t in ['db', 'sqlite'],
+                     "not testing file storage")
+    def test_batch(self):
+        """Test that batch writes once at the end of the block and undoes
+        the block if it raises"""
+        storage = FileStorage()
+        state = State(name="Volta")
+        state.save()
+        with storage.batch():
+            city = City(name="Ho", state_id=state.id)
+            city.save()
+            with open("file.json", "r") as f:
+                self.assertNotIn("City." + city.id, json.load(f))
+        with open("file.json", "r") as f:
+            self.assertIn("City." + city.id, json.load(f))
+        with self.assertRaises(ValueError):
+            with storage.batch():
+                other = City(name="Hohoe", state_id=state.id)
+                other.save()
+                state.name = "Oti"
+                state.save()
+                storage.delete(city)
+                raise ValueError
+        self.assertIsNone(storage.get(City, other.id))
+        self.assertEqual(storage.get(City, city.id).name, "Ho")
+        self.assertEqual(storage.get(State, state.id).name, "Volta")
+        with open("file.json", "r") as f:
+            self.assertNotIn("City." + other.id, json.load(f))
+
+    @unittest.skipIf(models.storage_t in ['db', 'sqlite'],
+                     "not testing file storage")
     def test_get(self):
         """Test if get retrives the right object"""
         storage = FileStorage()
@@ -126,7 +783,33 @@ class TestFileStorage(unittest.TestCase):
         self.assertEqual(state_id, retrieved_id)
         self.assertEqual(None, storage.get(State, '12345'))
 
-    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    @unittest.skipIf(models.storage_t in ['db', 'sqlite'],
+                     "not testing file storage")
+    def test_count_by_class(self):
+        """Test that count_by_class returns the count of every class"""
+        storage = FileStorage()
+        counts = storage.count_by_class()
+        self.assertEqual(set(counts), set(classes))
+        for name, count in counts.items():
+            self.assertEqual(count, storage.count(classes[name]))
+        self.assertEqual(sum(counts.values()), storage.count())
+
+    @unittest.skipIf(models.storage_t in ['db', 'sqlite'],
+                     "not testing file storage")
+    def test_get_many(self):
+        """Test that get_many returns the stored objects in the order of the
+        ids, without the missing ones"""
+        storage = FileStorage()
+        states = [State(name="Volta"), State(name="Oti")]
+        for state in states:
+            storage.new(state)
+        ids = [states[1].id, "12345", states[0].id]
+        self.assertEqual(storage.get_many(State, ids), states[::-1])
+        self.assertEqual(storage.get_many("State", ids), states[::-1])
+        self.assertEqual(storage.get_many(City, ids), [])
+
+    @unittest.skipIf(models.storage_t in ['db', 'sqlite'],
+                     "not testing file storage")
     def test_count(self):
         """Test if count returns the correct number of objects"""
         storage = FileStorage()
@@ -0,0 +1,229 @@
+#!/usr/bin/python3
+"""
+Contains the TestSQLiteStorageDocs and TestSQLiteStorage classes
+"""
+
+import inspect
+import models
+from models.engine import sqlite_storage
+from models.amenity import Amenity
+from models.city import City
+from models.state import State
+import os
+import pep8
+import unittest
+SQLiteStorage = sqlite_storage.SQLiteStorage
+
+
+class TestSQLiteStorageDocs(unittest.TestCase):
+    """Tests to check the documentation and style of SQLiteStorage class"""
+    @classmethod
+    def setUpClass(cls):
+        """Set up for the doc tests"""
+        cls.sls_f = inspect.getmembers(SQLiteStorage, inspect.isfunction)
+
+    def test_pep8_conformance_sqlite_storage(self):
+        """Test that models/engine/sqlite_storage.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['models/engine/sqlite_storage.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_conformance_test_sqlite_storage(self):
+        """Test tests/test_models/test_sqlite_storage.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['tests/test_models/test_engine/\
+test_sqlite_storage.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_sqlite_storage_module_docstring(self):
+        """Test for the sqlite_storage.py module docstring"""
+        self.assertIsNot(sqlite_storage.__doc__, None,
+                         "sqlite_storage.py needs a docstring")
+        self.assertTrue(len(sqlite_storage.__doc__) >= 1,
+                        "sqlite_storage.py needs a docstring")
+
+    def test_sqlite_storage_class_docstring(self):
+        """Test for the SQLiteStorage class docstring"""
+        self.assertIsNot(SQLiteStorage.__doc__, None,
+                         "SQLiteStorage class needs a docstring")
+        self.assertTrue(len(SQLiteStorage.__doc__) >= 1,
+                        "SQLiteStorage class needs a docstring")
+
+    def test_sls_func_docstrings(self):
+        """Test for the presence of docstrings in SQLiteStorage methods"""
+        for func in self.sls_f:
+            self.assertIsNot(func[1].__doc__, None,
+                             "{:s} method needs a docstring".format(func[0]))
+            self.assertTrue(len(func[1].__doc__) >= 1,
+                            "{:s} method needs a docstring".format(func[0]))
+
+
+@unittest.skipIf(models.storage_t == 'db', "not testing sqlite storage")
+class TestSQLiteStorage(unittest.TestCase):
+    """Test the SQLiteStorage class"""
+    def setUp(self):
+        """Creates a storage on an empty test database"""
+        os.environ["HBNB_SQLITE_DB"] = "test_hbnb.db"
+        self.storage = SQLiteStorage()
+        self.storage.reload()
+
+    def tearDown(self):
+        """Removes the test database"""
+        self.storage.close()
+        del os.environ["HBNB_SQLITE_DB"]
+        for suffix in ["", "-wal", "-shm"]:
+            if os.path.exists("test_hbnb.db" + suffix):
+                os.remove("test_hbnb.db" + suffix)
+
+    def test_new_save_get(self):
+        """Test that saved objects can be retrieved by class and id"""
+        state = State(name="Volta")
+        self.storage.new(state)
+        self.storage.save()
+        self.storage.close()
+        copy = self.storage.get(State, state.id)
+        self.assertEqual(copy.to_dict(), state.to_dict())
+        self.assertIsNone(self.storage.get(State, "12345"))
+        self.assertIsNone(self.storage.get(City, state.id))
+
+    def test_identity(self):
+        """Test that a thread gets the same object for a row until it closes
+        the storage"""
+        state = State(name="Volta")
+        city = City(name="Ho", state_id=state.id)
+        self.storage.new(state)
+        self.storage.new(city)
+        self.storage.save()
+        self.assertIs(self.storage.get(State, state.id), state)
+        self.storage.close()
+        copy = self.storage.get(State, state.id)
+        self.assertIsNot(copy, state)
+        self.assertIs(self.storage.all(State)["State." + state.id], copy)
+        self.assertIs(self.storage.get_many(State, [state.id])[0], copy)
+        found = self.storage.related(City, "state_id", state.id)[0]
+        self.assertIs(self.storage.get(City, city.id), found)
+        copy.name = "Oti"
+        self.storage.new(self.storage.get(State, state.id))
+        self.storage.save()
+        self.storage.close()
+        self.assertEqual(self.storage.get(State, state.id).name, "Oti")
+
+    def test_get_many(self):
+        """Test that get_many returns the stored objects in the order of the
+        ids, without the missing ones"""
+        states = [State(name=str(i)) for i in range(600)]
+        for state in states:
+            self.storage.new(state)
+        self.storage.save()
+        ids = [state.id for state in reversed(states)] + ["12345"]
+        found = self.storage.get_many(State, ids)
+        self.assertEqual([state.id for state in found], ids[:-1])
+        self.assertEqual(self.storage.get_many(City, ids), [])
+        self.assertEqual(self.storage.get_many(State, []), [])
+
+    def test_count_by_class(self):
+        """Test that count_by_class returns the count of every class"""
+        state = State(name="Volta")
+        for obj in [state, City(name="Ho", state_id=state.id),
+                    City(name="Hohoe", state_id=state.id)]:
+            self.storage.new(obj)
+        self.storage.save()
+        counts = self.storage.count_by_class()
+        self.assertEqual(set(counts), set(sqlite_storage.classes))
+        self.assertEqual((counts["State"], counts["City"], counts["User"]),
+                         (1, 2, 0))
+        self.assertEqual(self.storage.count(), 3)
+        self.assertEqual(self.storage.count("City"), 2)
+
+    def test_update(self):
+        """Test that new on a saved object updates its row"""
+        state = State(name="Volta")
+        self.storage.new(state)
+        self.storage.save()
+        state.name = "Oti"
+        self.storage.new(state)
+        self.storage.save()
+        self.assertEqual(self.storage.count(State), 1)
+        self.assertEqual(self.storage.get(State, state.id).name, "Oti")
+
+    def test_update_changed_fields(self):
+        """Test that new only writes the fields changed since the object was
+        saved or loaded"""
+        state = State(name="Volta")
+        city = City(name="Ho", state_id=state.id)
+        self.storage.new(state)
+        self.storage.new(city)
+        self.storage.save()
+        copy = self.storage.get(State, state.id)
+        copy.capital = "Ho"
+        self.storage.new(copy)
+        self.storage.save()
+        state.name = "Oti"
+        self.storage.new(state)
+        city.state_id = copy.id + "-2"
+        self.storage.new(city)
+        self.storage.save()
+        state = self.storage.get(State, state.id)
+        self.assertEqual((state.name, state.capital), ("Oti", "Ho"))
+        self.assertEqual(self.storage.related(City, "state_id", state.id), [])
+        self.assertEqual(
+            len(self.storage.related(City, "state_id", copy.id + "-2")), 1)
+
+    def test_close_rolls_back(self):
+        """Test that close drops the changes that were not saved"""
+        state = State(name="Volta")
+        self.storage.new(state)
+        self.storage.close()
+        self.assertIsNone(self.storage.get(State, state.id))
+
+    def test_all_count_delete(self):
+        """Test all, count and delete"""
+        state = State(name="Volta")
+        city = City(name="Ho", state_id=state.id)
+        amenity = Amenity(name="Wifi")
+        for obj in [state, city, amenity]:
+            self.storage.new(obj)
+        self.storage.save()
+        self.assertEqual(set(self.storage.all()),
+                         {"State." + state.id, "City." + city.id,
+                          "Amenity." + amenity.id})
+        self.assertEqual(list(self.storage.all(City)), ["City." + city.id])
+        self.assertEqual(list(self.storage.all("City")), ["City." + city.id])
+        self.assertEqual(self.storage.count(), 3)
+        self.assertEqual(self.storage.count(State), 1)
+        self.storage.delete(city)
+        self.storage.save()
+        self.assertEqual(self.storage.all(City), {})
+        self.assertEqual(self.storage.count(), 2)
+
+    def test_related(self):
+        """Test that related returns the children of an object"""
+        state = State(name="Volta")
+        city = City(name="Ho", state_id=state.id)
+        amenity = Amenity(name="Wifi")
+        for obj in [state, city, amenity]:
+            self.storage.new(obj)
+        self.storage.save()
+        cities = self.storage.related(City, "state_id", state.id)
+        self.assertEqual([c.id for c in cities], [city.id])
+        self.assertEqual(self.storage.related(City, "state_id", "1"), [])
+        amenities = self.storage.related(Amenity, "name", "Wifi")
+        self.assertEqual([a.id for a in amenities], [amenity.id])
+
+    def test_batch(self):
+        """Test that batch commits at the end of the block and rolls back
+        the block if it raises"""
+        state = State(name="Volta")
+        with self.assertRaises(ValueError):
+            with self.storage.batch():
+                self.storage.new(state)
+                self.storage.save()
+                raise ValueError
+        self.assertIsNone(self.storage.get(State, state.id))
+        with self.storage.batch():
+            self.storage.new(state)
+            self.storage.save()
+        self.storage.close()
+        self.assertEqual(self.storage.get(State, state.id).name, "Volta")
@@ -10,6 +10,7 @@ from models import user
 from models.base_model import BaseModel
 import pep8
 import unittest
+from unittest import mock
 User = user.User
 
 
@@ -130,3 +131,40 @@ class TestUser(unittest.TestCase):
         user = User()
         string = "[User] ({}) {}".format(user.id, user.__dict__)
         self.assertEqual(string, str(user))
+
+    def test_password_hash(self):
+        """test that passwords are hashed when set"""
+        u = User(password="secret")
+        self.assertEqual(u.password, "5ebe2294ecd0e0f08eab7690d2a6ee69")
+        self.assertTrue(u.check_password("secret"))
+        self.assertFalse(u.check_password("Secret"))
+        u = User(password=1234)
+        self.assertEqual(u.password, "81dc9bdb52d04dc20036dbd8313ed055")
+        self.assertTrue(u.check_password(1234))
+        self.assertTrue(u.check_password("1234"))
+        for name in ("pbkdf2_sha256", "scrypt"):
+            with mock.patch.object(user, "scheme", name), \
+                    mock.patch.object(user, "iterations", 1000):
+                u.password = "secret"
+            self.assertTrue(u.password.startswith(name + "$"))
+            self.assertTrue(u.check_password("secret"))
+            self.assertFalse(u.check_password("Secret"))
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing db storage")
+    def test_password_stored(self):
+        """test that the password of a stored user is not hashed again, while
+        passwords that look like hashes are"""
+        u = User(password="secret")
+        copy = User.from_dict(u.to_dict())
+        self.assertEqual(copy.password, u.password)
+        self.assertEqual(copy.changed_fields(), set())
+        self.assertTrue(copy.check_password("secret"))
+        for password in ("0123456789abcdef0123456789abcdef", "scrypt$x",
+                         "pbkdf2_sha256$1$c2FsdA$eA"):
+            u = User(password=password)
+            self.assertNotEqual(u.password, password)
+            self.assertTrue(u.check_password(password))
+            u.password = password
+            self.assertTrue(u.check_password(password))
+            self.assertFalse(User.from_dict(
+                {"password": password}).check_password(password))